@@ -7,9 +7,7 @@ import requests
 import json
 import pandas as pd
 from datetime import datetime
-
-# Riksdag API
-BASE_URL = "https://data.riksdagen.se/dokumentlista/"
+from riksdag_api import BASE_URL, count_documents, page_documents
 
 def test_riksdag_api():
     """ Test connection to Riksdag Open Data API """
@@ -33,8 +31,9 @@ def test_riksdag_api():
             data = response.json()
             
             if 'dokumentlista' in data:
-                docs = data['dokumentlista']['dokument']
-                print(f"\n📊 Found {len(docs)} documents for Jan 2023")
+                docs = page_documents(data['dokumentlista'])
+                total = data['dokumentlista'].get('@traffar', len(docs))
+                print(f"\n📊 Found {total} documents for Jan 2023 ({len(docs)} on first page)")
                 
                 if len(docs) > 0:
                     print("\n📄 Sample document structure:")
@@ -61,26 +60,19 @@ def get_available_years():
             'doktyp': 'prot',
             'from': f'{year}-01-01',
             'tom': f'{year}-12-31',
-            'utformat': 'json',
-            
         }
         
         try:
-            response = requests.get(BASE_URL, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'dokumentlista' in data:
-                    count = len(data['dokumentlista']['dokument'])
-                    print(f"  {year}: {count} documents")
-                    years_with_data.append({
-                        'year': year,
-                        'count': count
-                    })
+            # @traffar is the true total - the first page alone is capped
+            count = count_documents(params)
+            print(f"  {year}: {count} documents")
+            years_with_data.append({
+                'year': year,
+                'count': count
+            })
                 
-        except:
-            pass
+        except Exception as e:
+            print(f"  {year}: error {e}")
 
     return pd.DataFrame(years_with_data)
 
@@ -1,37 +1,33 @@
 """
 Download all debate metadata from the Riksdag API for 2018-2024
 This will be used to get the list of all debates and their IDs
+
+Run with --incremental to only fetch protocols that are new or changed
+since the last sync (tracked by the highest systemdatum seen).
 """
-import requests
 import pandas as pd
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
 from tqdm import tqdm
 import json
+import os
+import argparse
+from riksdag_api import BASE_URL, iter_dokumentlista, count_documents
+from instrumentation import Recorder, RunReport, recording, merge_snapshot
 
-BASE_URL = "https://data.riksdagen.se/dokumentlista/"
+SYNC_STATE_FILE = 'data/raw/metadata_sync_state.json'
 
 def get_debates_for_period(start_date, end_date):
-    """Get all debate documents for a date range"""
+    """Get all debate documents for a date range (every page, not just the first)"""
     
     params = {
         'doktyp': 'prot',
         'from': start_date,
         'tom': end_date,
-        'utformat': 'json',
         'sort': 'datum'
     }
     
     try:
-        response = requests.get(BASE_URL, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if 'dokumentlista' in data and 'dokument' in data['dokumentlista']:
-                return data['dokumentlista']['dokument']
-        
-        return []
+        return list(iter_dokumentlista(params))
         
     except Exception as e:
         print(f"Error fetching {start_date} to {end_date}: {e}")
@@ -39,28 +35,27 @@ def get_debates_for_period(start_date, end_date):
 
 def download_all_metadata(start_year=2018, end_year=2024):
     """Download metadata for all debates in date range"""
+
+    params = {
+        'doktyp': 'prot',
+        'from': f"{start_year}-01-01",
+        'tom': f"{end_year}-12-31",
+        'sort': 'datum'
+    }
+
+    # Pagination gives full coverage, so no need to split into quarters
+    total = count_documents(params)
+    print(f"\n📅 Downloading {total} protocols {start_year}-{end_year}...")
+
+    all_debates = list(tqdm(iter_dokumentlista(params), total=total, desc="Protocols"))
     
-    all_debates = []
-    
-    # Download year by year to avoid timeouts
-    for year in range(start_year, end_year + 1):
-        print(f"\n📅 Downloading {year}...")
-        
-        # Split year into quarters to avoid API limits
-        quarters = [
-            (f"{year}-01-01", f"{year}-03-31"),
-            (f"{year}-04-01", f"{year}-06-30"),
-            (f"{year}-07-01", f"{year}-09-30"),
-            (f"{year}-10-01", f"{year}-12-31")
-        ]
-        
-        for start, end in tqdm(quarters, desc=f"Year {year}"):
-            debates = get_debates_for_period(start, end)
-            all_debates.extend(debates)
-            time.sleep(1)  # Be polite to the server
-    
+    return clean_metadata(all_debates)
+
+def clean_metadata(debates):
+    """Turn raw dokumentlista entries into the tidy metadata table"""
+
     # Convert to DataFrame
-    metadata_df = pd.DataFrame(all_debates)
+    metadata_df = pd.DataFrame(debates)
     
     if len(metadata_df) > 0:
        df_clean = pd.DataFrame({
@@ -69,6 +64,7 @@ def download_all_metadata(start_year=2018, end_year=2024):
            'beteckning': metadata_df['beteckning'],
            'titel': metadata_df['titel'],
            'datum': metadata_df['datum'],
+           'systemdatum': metadata_df.get('systemdatum', ''),
            'debattnamn': metadata_df.get('debattnamn', ''),
            'dok_url_html': metadata_df.get('dok_url_html', ''),
            'dok_url_txt': metadata_df.get('dok_url_txt', ''),
@@ -86,12 +82,147 @@ def download_all_metadata(start_year=2018, end_year=2024):
     
     return pd.DataFrame()
 
+def mark_value(value):
+    """A high-water mark as a string, or None when it is missing ('', NaN, 'nan')"""
+    if value is None or pd.isna(value) or str(value).strip() in ('', 'nan', 'NaT'):
+        return None
+    return str(value)
+
+def column_mark(df, column):
+    """Highest non-missing value of a metadata column, or None"""
+    if column not in df.columns:
+        return None
+    values = [v for v in df[column].map(mark_value) if v is not None]
+    return max(values) if values else None
+
+def load_sync_state(state_file=SYNC_STATE_FILE, metadata_file=None):
+    """Read the high-water mark, falling back to the newest values in the existing CSV"""
+
+    state = {'max_datum': None, 'max_systemdatum': None, 'last_sync': None}
+
+    if os.path.exists(state_file):
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state.update(json.load(f))
+    elif metadata_file and os.path.exists(metadata_file):
+        # CSVs written before systemdatum was tracked have no such column,
+        # so the mark stays None and the first sync seeds it
+        existing = pd.read_csv(metadata_file)
+        state['max_datum'] = column_mark(existing, 'datum')
+        state['max_systemdatum'] = column_mark(existing, 'systemdatum')
+
+    state['max_datum'] = mark_value(state['max_datum'])
+    state['max_systemdatum'] = mark_value(state['max_systemdatum'])
+    return state
+
+def save_sync_state(state, state_file=SYNC_STATE_FILE):
+    tmp_file = state_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, state_file)
+
+def get_changed_debates(since_systemdatum=None, start_year=2018, page_size=200, base_url=BASE_URL):
+    """
+    Get protocols that are new or changed since the high-water mark.
+    Sorted by systemdatum (newest first), so we can stop paging as soon
+    as we reach documents older than the mark. Documents stamped exactly
+    at the mark are fetched again, since one of them may not have been
+    seen yet; merging by dok_id makes that harmless.
+    Without a mark every protocol since start_year is fetched: a document
+    with an old datum can still have a new systemdatum, so datum is no
+    substitute for the mark.
+    Returns the documents and the number of pages requested.
+    """
+
+    params = {
+        'doktyp': 'prot',
+        'from': f"{start_year}-01-01",
+        'sort': 'systemdatum',
+        'sortorder': 'desc'
+    }
+
+    changed = []
+    seen = set()
+
+    # Sequential pages, so stopping early skips the pages we don't need.
+    # The pages requested are counted by the API helper into this recorder.
+    pages = Recorder()
+    with recording(pages):
+        for doc in iter_dokumentlista(params, page_size=page_size, workers=1, base_url=base_url):
+            if since_systemdatum and doc.get('systemdatum', '') < since_systemdatum:
+                break
+            # A document can show up twice when the listing shifts between pages
+            if doc.get('dok_id') not in seen:
+                seen.add(doc.get('dok_id'))
+                changed.append(doc)
+    merge_snapshot(pages.snapshot())
+
+    return changed, pages.counters.get('api_pages', 0)
+
+def incremental_sync(metadata_file='data/raw/riksdag_debates_metadata.csv',
+                     state_file=SYNC_STATE_FILE,
+                     start_year=2018,
+                     page_size=200,
+                     base_url=BASE_URL):
+    """Fetch only new/changed protocols and merge them into the metadata CSV by dok_id"""
+
+    state = load_sync_state(state_file, metadata_file)
+    print(f"📌 High-water mark: systemdatum={state['max_systemdatum']}, datum={state['max_datum']}")
+    if state['max_systemdatum'] is None:
+        print(f"   No systemdatum mark yet: fetching every protocol since {start_year} once to seed it")
+
+    changed, requests_made = get_changed_debates(state['max_systemdatum'], start_year, page_size, base_url)
+    print(f"🔄 {len(changed)} new or changed protocols ({requests_made} API requests)")
+
+    if os.path.exists(metadata_file):
+        existing = pd.read_csv(metadata_file)
+    else:
+        existing = pd.DataFrame()
+
+    updates = clean_metadata(changed)
+
+    if len(updates) > 0:
+        # Changed rows replace the old version of the same dok_id
+        merged = pd.concat([existing, updates], ignore_index=True)
+        merged = merged.drop_duplicates(subset='dok_id', keep='last')
+        merged['date'] = pd.to_datetime(merged['datum'])
+        merged = merged.sort_values(by='date').reset_index(drop=True)
+    else:
+        merged = existing
+
+    if len(merged) > 0:
+        state['max_datum'] = column_mark(merged, 'datum')
+        # Keep the old mark if no row carries a systemdatum
+        state['max_systemdatum'] = column_mark(merged, 'systemdatum') or state['max_systemdatum']
+    state['last_sync'] = datetime.now().isoformat(timespec='seconds')
+
+    return merged, state, len(updates)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download Riksdag debate metadata")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch protocols new/changed since the last sync")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("RIKSDAG METADATA DOWNLOADER")
     print("=" * 60)
+
+    output_file = 'data/raw/riksdag_debates_metadata.csv'
+    report = RunReport('02_download_metadata').start()
+    report.set('incremental', args.incremental)
     
-    debates_df = download_all_metadata(2018, 2024)
+    if args.incremental:
+        with report.timer('incremental_sync'):
+            debates_df, sync_state, n_changed = incremental_sync(output_file)
+        report.count('changed_documents', n_changed)
+    else:
+        with report.timer('download_all'):
+            debates_df = download_all_metadata(2018, 2024)
+        sync_state = {
+            'max_datum': column_mark(debates_df, 'datum'),
+            'max_systemdatum': column_mark(debates_df, 'systemdatum'),
+            'last_sync': datetime.now().isoformat(timespec='seconds')
+        }
     
     #Summary Statistics
     print("\n\n📊 SUMMARY:")
@@ -100,7 +231,6 @@ if __name__ == "__main__":
     print(debates_df['year'].value_counts().sort_index())
 
     #Save to CSV
-    output_file = 'data/raw/riksdag_debates_metadata.csv'
     debates_df.to_csv(output_file, index=False, encoding='utf-8')
     print(f"\n✅ Metadata saved to {output_file}")
 
@@ -108,3 +238,9 @@ if __name__ == "__main__":
     output_json = 'data/raw/riksdag_debates_metadata.json'
     debates_df.to_json(output_json, orient='records', force_ascii=False, indent=2)
     print(f"✅ Metadata also saved to {output_json}")
+
+    save_sync_state(sync_state)
+    print(f"✅ Sync state saved to {SYNC_STATE_FILE}")
+
+    report.count('documents', len(debates_df))
+    report.finish()
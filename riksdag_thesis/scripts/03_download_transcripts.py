@@ -1,46 +1,132 @@
 """
 Download Full Transcripts of Riksdag Debates
-This is the heavy lifting - will take 2-3 hours
+Downloads run on a small thread pool sharing one keep-alive session,
+throttled by a token bucket so we stay polite to the API.
 """
 import requests
 import pandas as pd 
 from bs4 import BeautifulSoup
 import time 
 from tqdm import tqdm
-import json
 import os
+import threading
+import argparse
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from download_manifest import DownloadManifest, write_atomic, sha256_bytes
+from instrumentation import RunReport, count
+
+BASE_URL = "https://data.riksdagen.se/dokument/"
+MANIFEST_NAME = "download_manifest.jsonl"
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` requests per second on average"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def make_session(pool_size=8):
+    """One shared keep-alive connection pool for all download threads"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+# Statuses worth retrying - anything else (e.g. 404) is a permanent failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def fetch_debate_text(dok_id, session=None, base_url=BASE_URL, rate_limiter=None):
+    """Fetch one debate, returning (text or None, HTTP status). Network errors propagate."""
 
-def download_debate_text(dok_id):
-    """Download full text for a single debate"""
-    
     # Riksdag provides text in both HTML and plain text
-    text_url = f"https://data.riksdagen.se/dokument/{dok_id}.txt"
-    html_url = f"https://data.riksdagen.se/dokument/{dok_id}.html"
+    text_url = f"{base_url}{dok_id}.txt"
+    html_url = f"{base_url}{dok_id}.html"
+    http = session if session is not None else requests
+
+    # Try plain text first (cleaner)
+    if rate_limiter:
+        rate_limiter.acquire()
+    response = http.get(text_url, timeout=30)
+
+    if response.status_code == 200:
+        return response.text, 200
+    if response.status_code in RETRY_STATUSES:
+        return None, response.status_code
+
+    # Fallback to HTML
+    if rate_limiter:
+        rate_limiter.acquire()
+    response = http.get(html_url, timeout=30)
+    if response.status_code == 200:
+        soup = BeautifulSoup(response.content, 'html.parser')
+        # Extract text from HTML
+        text = soup.get_text(separator='\n', strip=True)
+        return text, 200
+
+    return None, response.status_code
+
+def download_debate_text(dok_id, session=None, base_url=BASE_URL, rate_limiter=None):
+    """Download full text for a single debate"""
     
     try:
-        # Try plain text first (cleaner)
-        response = requests.get(text_url, timeout=30)
-        
-        if response.status_code == 200:
-            return response.text
-        
-        # Fallback to HTML
-        response = requests.get(html_url, timeout=30)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            # Extract text from HTML
-            text = soup.get_text(separator='\n', strip=True)
-            return text
-        
-        return None
+        text, _ = fetch_debate_text(dok_id, session, base_url, rate_limiter)
+        return text
         
     except Exception as e:
         print(f"Error downloading {dok_id}: {e}")
         return None
+
+def download_with_retry(dok_id, session=None, base_url=BASE_URL, rate_limiter=None,
+                        max_attempts=4, backoff=1.0):
+    """Download with exponential backoff + jitter. Returns (text, status, attempts)."""
+
+    status = None
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            text, status = fetch_debate_text(dok_id, session, base_url, rate_limiter)
+            if text is not None or status not in RETRY_STATUSES:
+                return text, status, attempt
+        except requests.RequestException as e:
+            status = None
+            if attempt == max_attempts:
+                print(f"Error downloading {dok_id}: {e}")
+
+        if attempt < max_attempts:
+            count('retries')
+            # 1s, 2s, 4s ... plus up to 100% jitter so workers don't retry in lockstep
+            delay = backoff * 2 ** (attempt - 1)
+            time.sleep(delay + random.uniform(0, delay))
+
+    return None, status, max_attempts
     
 def download_all_transcripts(metadata_file='data/raw/riksdag_debates_metadata.csv',
                             output_dir='data/raw/transcripts',
-                            sample_size=None):
+                            sample_size=None,
+                            workers=4,
+                            rate=4.0,
+                            base_url=BASE_URL,
+                            max_attempts=4,
+                            retry_failed=False):
     """Download all debate transcripts"""
     
     # Create output directory
@@ -52,40 +138,70 @@ def download_all_transcripts(metadata_file='data/raw/riksdag_debates_metadata.cs
     if sample_size:
         print(f"⚠️  Sampling {sample_size} debates for testing")
         debates = debates.sample(n=sample_size, random_state=42)
-    
-    print(f"\n📥 Downloading {len(debates)} debate transcripts...")
-    print("This will take 2-3 hours. Get some coffee! ☕\n")
+
+    # Resume from the manifest instead of checking every file on disk
+    manifest = DownloadManifest(os.path.join(output_dir, MANIFEST_NAME))
+    if len(manifest) == 0:
+        adopted = manifest.adopt_existing(output_dir)
+        if adopted:
+            print(f"📋 Registered {adopted} previously downloaded transcripts in the manifest")
     
     successful = 0
     failed = []
+    pending = []
 
-    for idx, row in tqdm(debates.iterrows(), total=len(debates)):
-        dok_id = row['dok_id']
-        
-        # Check if already downloaded
-        output_file = os.path.join(output_dir, f"{dok_id}.txt")
-
-        if os.path.exists(output_file):
-            successful += 1
-            continue
+    for dok_id in debates['dok_id']:
+        entry = manifest.get(dok_id)
 
-        # Download text
-        text = download_debate_text(dok_id)
-        
-        if text:
-            # Save to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(text)
+        if entry is None:
+            pending.append(dok_id)
+        elif entry['state'] == 'done':
             successful += 1
+        elif retry_failed:
+            pending.append(dok_id)
         else:
             failed.append(dok_id)
-        
-        # Be polite to the server
-        time.sleep(0.5)
 
-        # Save Progress Every 50 Documents
-        if (idx + 1) % 50 == 0:
-            print(f"\n  Progress: {successful}/{len(debates)} successful")
+    print(f"\n📥 Downloading {len(pending)} of {len(debates)} debate transcripts...")
+    print(f"Using {workers} workers at max {rate:g} requests/second\n")
+
+    session = make_session(pool_size=workers)
+    limiter = TokenBucket(rate)
+
+    def fetch_and_save(dok_id):
+        text, status, attempts = download_with_retry(dok_id, session=session, base_url=base_url,
+                                                     rate_limiter=limiter, max_attempts=max_attempts)
+        attempts += manifest.attempts(dok_id)
+
+        if text:
+            # Save to file - atomically, so a crash never leaves a truncated transcript
+            data = text.encode('utf-8')
+            write_atomic(os.path.join(output_dir, f"{dok_id}.txt"), data)
+            count('downloaded')
+            count('bytes', len(data))
+            manifest.record(dok_id, 'done', size=len(data), sha256=sha256_bytes(data),
+                            http_status=status, attempts=attempts)
+            return True
+
+        manifest.record(dok_id, 'failed', http_status=status, attempts=attempts)
+        count('failed')
+        return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_and_save, dok_id): dok_id for dok_id in pending}
+
+        for done, future in enumerate(tqdm(as_completed(futures), total=len(futures)), 1):
+            if future.result():
+                successful += 1
+            else:
+                failed.append(futures[future])
+
+            # Report progress every 50 documents
+            if done % 50 == 0:
+                print(f"\n  Progress: {successful}/{len(debates)} successful")
+
+    session.close()
+    manifest.compact()
 
     print(f"\n\n✅ COMPLETE:")
     print(f"  Successful: {successful}")
@@ -93,30 +209,58 @@ def download_all_transcripts(metadata_file='data/raw/riksdag_debates_metadata.cs
     
     if failed:
         print(f"\n  Failed IDs saved to: {output_dir}/failed_downloads.txt")
+        print(f"  (full per-document state in {output_dir}/{MANIFEST_NAME})")
         with open(f"{output_dir}/failed_downloads.txt", 'w') as f:
                 f.write('\n'.join(failed))
 
     return successful,failed
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download Riksdag debate transcripts")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent downloads")
+    parser.add_argument('--rate', type=float, default=4.0, help="Max requests per second")
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help="Document endpoint, e.g. http://localhost:8765/dokument/ for the stub server")
+    parser.add_argument('--metadata', default='data/raw/riksdag_debates_metadata.csv')
+    parser.add_argument('--output-dir', default='data/raw/transcripts')
+    parser.add_argument('--max-attempts', type=int, default=4, help="Tries per document before giving up")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Retry documents the manifest marks as failed")
+    parser.add_argument('--yes', action='store_true',
+                        help="Skip the 5-debate test and the confirmation prompt (for unattended runs)")
+    args = parser.parse_args()
+
+    options = dict(metadata_file=args.metadata, output_dir=args.output_dir,
+                   workers=args.workers, rate=args.rate, base_url=args.base_url,
+                   max_attempts=args.max_attempts, retry_failed=args.retry_failed)
+
     print("=" * 60)
     print("DOWNLOAD RIKSDAG DEBATE TRANSCRIPTS")
     print("=" * 60)
 
-    # First do a small test
-    print("\n🧪 Running test with 5 debates...")
-    test_success, test_failed = download_all_transcripts(sample_size=5)
-
-    if test_success > 0:
-        print("\n✅ Test successful! Ready for full download.")
+    if args.yes:
+        test_success, proceed = 1, 'y'
+    else:
+        # First do a small test
+        print("\n🧪 Running test with 5 debates...")
+        test_success, test_failed = download_all_transcripts(sample_size=5, **options)
 
-        proceed = input("\n⚠️  Download ALL debates? This takes 2-3 hours. (y/n): ")
+        if test_success > 0:
+            print("\n✅ Test successful! Ready for full download.")
+            proceed = input("\n⚠️  Download ALL debates? (y/n): ")
 
+    if test_success > 0:
         if proceed.lower() == 'y':
-            successful, failed = download_all_transcripts()
+            report = RunReport('03_download_transcripts').start()
+            report.set('workers', args.workers)
+            report.set('rate', args.rate)
+
+            with report.timer('download_all'):
+                successful, failed = download_all_transcripts(**options)
+            report.finish()
 
             print("\n\n🎉 DOWNLOAD COMPLETE!")
-            print(f"Transcripts saved to: data/raw/transcripts/")
+            print(f"Transcripts saved to: {args.output_dir}/")
         
     else:
-        print("\n❌ Test failed. Check your internet connection and API access.")
\ No newline at end of file
+        print("\n❌ Test failed. Check your internet connection and API access.")
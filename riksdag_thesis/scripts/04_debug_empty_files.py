@@ -1,161 +1,105 @@
 """
-Debug why 452 files are "empty" (no speeches found)
-"""
+Debug why files are "empty" (no speeches found)
+04_parse_speeches.py records indicators of speech content for every
+transcript while it parses (length, party codes, 'Anf.' markers, speaker
+matches) and writes them to data/processed/file_stats.csv next to the
+number of speeches found. This script only queries that table, so
+nothing is re-parsed.
 
+Usage:
+    python scripts/04_debug_empty_files.py                  # files with indicators but no speeches
+    python scripts/04_debug_empty_files.py --all            # every file without speeches
+    python scripts/04_debug_empty_files.py --compare        # indicators of empty vs. non-empty files
+    python scripts/04_debug_empty_files.py --sample H50974  # raw text around the first party code
+"""
+import argparse
 import os
 import re
-from bs4 import BeautifulSoup
-import random
+import pandas as pd
+from transcript_archive import TRANSCRIPT_DIR, read_transcript
 
-def check_file_content(filepath):
-    """Check what's actually in a file"""
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Check for HTML
-    has_html = '<html>' in content.lower()
-    
-    # Extract text
-    if has_html:
-        html_match = re.search(r'<html>(.*?)(?:</html>|$)', content, re.DOTALL | re.IGNORECASE)
-        if html_match:
-            soup = BeautifulSoup(html_match.group(1), 'html.parser')
-            text = soup.get_text()
-        else:
-            text = content
-    else:
-        text = content
-    
-    # Check for key indicators
-    indicators = {
-        'length': len(text),
-        'has_html': has_html,
-        'party_codes': len(re.findall(r'\(([SMVCLKD]{1,2})\)', text)),
-        'anf_markers': text.count('Anf.'),
-        'talman': text.count('talman'),
-        'anförande_word': text.lower().count('anförande'),
-        'has_names': len(re.findall(r'[A-ZÅÄÖ][a-zåäö]+\s+[A-ZÅÄÖ][a-zåäö]+', text[:10000])),
-    }
-    
-    return indicators
+FILE_STATS_CSV = 'data/processed/file_stats.csv'
+# Same names as FILE_FEATURES in 04_parse_speeches.py
+INDICATORS = ['length', 'text_length', 'party_codes', 'anf_markers', 'speaker_matches']
+
+def load_file_stats(path=FILE_STATS_CSV):
+    """Per-file parse stats with indicators; exits if 04 has not recorded them yet"""
+    if not os.path.exists(path):
+        raise SystemExit(f"❌ {path} not found: run 04_parse_speeches.py first")
+
+    stats = pd.read_csv(path, keep_default_na=False, na_values=[''])
+    missing = [c for c in INDICATORS if c not in stats.columns]
+    if missing:
+        raise SystemExit(f"❌ {path} has no {', '.join(missing)} column(s): re-run 04_parse_speeches.py")
+
+    # Files without an <html> payload have no text indicators
+    stats[INDICATORS] = stats[INDICATORS].fillna(0).astype(int)
+    return stats
+
+def empty_with_indicators(stats, min_party_codes=5):
+    """Files without speeches that still contain 'Anf.' markers, speaker matches or party codes"""
+    empty = stats[stats['speeches'] == 0]
+    has_content = ((empty['anf_markers'] > 0) | (empty['speaker_matches'] > 0)
+                   | (empty['party_codes'] >= min_party_codes))
+    return empty[has_content].sort_values(['speaker_matches', 'anf_markers', 'party_codes'], ascending=False)
+
+def print_files(files):
+    columns = ['file', 'speeches'] + INDICATORS + (['error'] if 'error' in files.columns else [])
+    print(files[columns].fillna({'error': ''}).to_string(index=False))
+
+def print_sample(dok_id, transcript_dir=TRANSCRIPT_DIR):
+    """Raw transcript text around the first party code"""
+    content = read_transcript(os.path.join(transcript_dir, f"{dok_id}.txt"))
+    match = re.search(r'\([A-ZÅÄÖ]{1,2}\)', content)
+    if not match:
+        print(f"   No party code in {dok_id}")
+        return
+
+    print(f"\n📄 {dok_id}: sample around first party code")
+    print("   " + "-" * 66)
+    print("   " + content[max(0, match.start() - 200):match.end() + 300])
+    print("   " + "-" * 66)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find transcripts where the parser found no speeches")
+    parser.add_argument('--all', action='store_true', help="List every file without speeches")
+    parser.add_argument('--compare', action='store_true', help="Describe indicators of empty vs. non-empty files")
+    parser.add_argument('--min-party-codes', type=int, default=5,
+                        help="Party codes that count as an indicator on their own")
+    parser.add_argument('--sample', metavar='DOK_ID', help="Print raw text around the first party code")
+    parser.add_argument('--stats', default=FILE_STATS_CSV)
+    args = parser.parse_args()
+
+    if args.sample:
+        print_sample(args.sample)
+        raise SystemExit(0)
+
+    stats = load_file_stats(args.stats)
+    empty = stats[stats['speeches'] == 0]
 
-def analyze_empty_files():
-    """Analyze files that parser marked as empty"""
-    
     print("=" * 70)
     print("ANALYZING 'EMPTY' FILES")
     print("=" * 70)
-    
-    transcript_dir = 'data/raw/transcripts'
-    
-    # Load parsing stats to see which files were empty
-    import pandas as pd
-    stats = pd.read_csv('data/processed/parsing_stats.csv')
-    
-    empty_files = stats[stats['speeches'] == 0]['file'].tolist()
-    non_empty_files = stats[stats['speeches'] > 0]['file'].tolist()
-    
-    print(f"\nEmpty files: {len(empty_files)}")
-    print(f"Non-empty files: {len(non_empty_files)}")
-    
-    # Sample 10 random empty files
-    sample_empty = random.sample(empty_files, min(10, len(empty_files)))
-    
-    print("\n" + "=" * 70)
-    print("SAMPLING 10 'EMPTY' FILES")
-    print("=" * 70)
-    
-    for filename in sample_empty:
-        filepath = os.path.join(transcript_dir, filename)
-        
-        print(f"\n📄 {filename}")
-        
-        indicators = check_file_content(filepath)
-        
-        print(f"   Length: {indicators['length']:,} chars")
-        print(f"   Has HTML: {indicators['has_html']}")
-        print(f"   Party codes: {indicators['party_codes']}")
-        print(f"   'Anf.' markers: {indicators['anf_markers']}")
-        print(f"   'talman' mentions: {indicators['talman']}")
-        print(f"   'anförande' word: {indicators['anförande_word']}")
-        print(f"   Name patterns: {indicators['has_names']}")
-        
-        # If it has content, show sample
-        if indicators['length'] > 10000 and indicators['party_codes'] > 5:
-            print(f"   ⚠️ This file HAS content but parser missed it!")
-            
-            # Show a sample
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Find first party code occurrence
-            match = re.search(r'.{200}(\([SMVCLKD]+\)).{500}', content, re.DOTALL)
-            if match:
-                print(f"\n   Sample around first party code:")
-                print("   " + "-" * 66)
-                print("   " + match.group(0)[:500])
-                print("   " + "-" * 66)
-    
-    # Compare with non-empty files
-    print("\n\n" + "=" * 70)
-    print("COMPARING WITH NON-EMPTY FILES")
-    print("=" * 70)
-    
-    sample_non_empty = random.sample(non_empty_files, min(5, len(non_empty_files)))
-    
-    for filename in sample_non_empty:
-        filepath = os.path.join(transcript_dir, filename)
-        
-        print(f"\n📄 {filename} (HAS SPEECHES)")
-        
-        indicators = check_file_content(filepath)
-        
-        print(f"   Length: {indicators['length']:,} chars")
-        print(f"   Party codes: {indicators['party_codes']}")
-        print(f"   'Anf.' markers: {indicators['anf_markers']}")
-        print(f"   'talman' mentions: {indicators['talman']}")
-    
-    # Statistical comparison
-    print("\n\n" + "=" * 70)
-    print("STATISTICAL COMPARISON")
-    print("=" * 70)
-    
-    empty_indicators = []
-    for filename in random.sample(empty_files, min(50, len(empty_files))):
-        filepath = os.path.join(transcript_dir, filename)
-        empty_indicators.append(check_file_content(filepath))
-    
-    non_empty_indicators = []
-    for filename in non_empty_files:
-        filepath = os.path.join(transcript_dir, filename)
-        non_empty_indicators.append(check_file_content(filepath))
-    
-    import pandas as pd
-    
-    df_empty = pd.DataFrame(empty_indicators)
-    df_non_empty = pd.DataFrame(non_empty_indicators)
-    
-    print("\nEMPTY FILES (sample of 50):")
-    print(df_empty.describe())
-    
-    print("\n\nNON-EMPTY FILES (all):")
-    print(df_non_empty.describe())
-    
-    print("\n\n" + "=" * 70)
-    print("CONCLUSION")
-    print("=" * 70)
-    
-    print("""
-The issue is likely one of:
-
-1. Parser regex is too strict (only matches specific format)
-2. Files have different formats (some debates vs. other doc types)
-3. Speech markers vary (not always "Anf.")
-4. Party code placement is different in most files
+    print(f"\nEmpty files: {len(empty)}")
+    print(f"Non-empty files: {len(stats) - len(empty)}")
+    if 'error' in stats.columns:
+        print(f"Parse errors: {stats['error'].notna().sum()}")
 
-Next: Examine the samples above to see which is the issue.
-    """)
+    if args.compare:
+        print("\nEMPTY FILES:")
+        print(empty[INDICATORS].describe())
+        print("\nNON-EMPTY FILES:")
+        print(stats.loc[stats['speeches'] > 0, INDICATORS].describe())
+        raise SystemExit(0)
 
-if __name__ == "__main__":
-    analyze_empty_files()
\ No newline at end of file
+    if args.all:
+        print(f"\n📄 All {len(empty)} files without speeches:\n")
+        print_files(empty.sort_values('file'))
+    else:
+        missed = empty_with_indicators(stats, args.min_party_codes)
+        if len(missed) == 0:
+            print("\n✅ No empty file has 'Anf.' markers, speaker matches or party codes")
+        else:
+            print(f"\n⚠️  {len(missed)} files have content indicators but no speeches:\n")
+            print_files(missed)
+            print(f"\nNext: python scripts/04_debug_empty_files.py --sample {missed['file'].iloc[0][:-4]}")
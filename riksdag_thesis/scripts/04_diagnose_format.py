@@ -5,6 +5,7 @@ Diagnose the exact format of Riksdag transcripts
 import re
 import os
 from bs4 import BeautifulSoup
+from transcript_archive import read_transcript
 
 def diagnose_transcript(filepath):
     """Deep dive into transcript structure"""
@@ -13,8 +14,7 @@ def diagnose_transcript(filepath):
     print("TRANSCRIPT FORMAT DIAGNOSIS")
     print("=" * 70)
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = read_transcript(filepath)
     
     print(f"\nFile: {os.path.basename(filepath)}")
     print(f"Total length: {len(content):,} characters\n")
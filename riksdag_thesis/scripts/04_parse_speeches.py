@@ -3,6 +3,7 @@ Parse Debate Transcripts into Individual Speeches
 Extract speaker names, party affiliations, and speech 
 texts from raw transcript files.
 """
+import numpy as np
 import pandas as pd
 import re
 from bs4 import BeautifulSoup
@@ -10,203 +11,674 @@ from tqdm import tqdm
 import os
 import xml.etree.ElementTree as ET
 import html
+import argparse
+import bisect
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from lxml import etree, html as lxml_html
+from parse_cache import ParseCache, CACHE_DIR, content_hash
+from speech_store import write_speeches, has_pyarrow, SPEECHES_DATASET, SPEECHES_CSV
+from transcript_archive import TranscriptArchive, ARCHIVE_FILE, open_archive, read_transcript
+from speech_index import SpeechIndex, SPEECH_INDEX_FILE
+from compact_store import CompactSpeechStore, COMPACT_DIR
+from speaker_resolution import resolve_speakers, load_speaker_ids, SPEAKERS_CSV
+from instrumentation import Recorder, RunReport, recording, is_recording, merge_snapshot, timer, count
+
+# Per-document fields read from the <dokument> header
+HEADER_FIELDS = ('dok_id', 'datum', 'titel', 'rm', 'systemdatum', 'status', 'hangar_id')
+HEADER_CHUNK = 4096
 
 def extract_metadata_from_xml(text):
-    """Extract metadata"""
+    """
+    Extract metadata from the <dokument> header. The XML is read incrementally
+    and reading stops at the <html> element, so the (huge) speech payload is
+    never scanned or parsed.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    fields = {}
+    in_dokument = False
+
     try:
-        xml_match = re.search(r'<dokument>(.*?)</dokument>', text, re.DOTALL)
-        if xml_match:
-            xml_text = '<dokument>' + xml_match.group(1) + '</dokument>'
-            root = ET.fromstring(xml_text)
-            
-            metadata = {
-                'dok_id': root.find('dok_id').text if root.find('dok_id') is not None else None,
-                'datum': root.find('datum').text.split()[0] if root.find('datum') is not None else None,
-                'titel': root.find('titel').text if root.find('titel') is not None else None,
-                'rm': root.find('rm').text if root.find('rm') is not None else None
-            }
-            return metadata
-    except:
+        for start in range(0, len(text), HEADER_CHUNK):
+            parser.feed(text[start:start + HEADER_CHUNK])
+
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if elem.tag == 'dokument':
+                        in_dokument = True
+                    elif elem.tag == 'html':
+                        return header_metadata(fields) if in_dokument else {}
+                elif in_dokument and elem.tag in HEADER_FIELDS:
+                    fields[elem.tag] = elem.text
+                elif elem.tag == 'dokument':
+                    return header_metadata(fields)
+    except ET.ParseError:
         pass
-    return {}
 
-def parse_riksdag_html(html_text, filename=""):
-    """Parse speeches - handles HTML entities properly"""
-    
-    speeches = []
-    
-    try:
-        # Decode HTML entities FIRST
-        html_decoded = html.unescape(html_text)
+    return header_metadata(fields) if in_dokument else {}
+
+def header_metadata(fields):
+    """Metadata dict with every header field (None when missing)"""
+    metadata = {field: fields.get(field) for field in HEADER_FIELDS}
+    if metadata['datum']:
+        metadata['datum'] = metadata['datum'].split()[0]
+    return metadata
+
+# One row per transcript: parse outcome and the FILE_FEATURES (see 04_debug_empty_files.py)
+FILE_STATS_CSV = 'data/processed/file_stats.csv'
+
+# Bump whenever parsing output changes, so cached results are not reused
+PARSER_VERSION = '6'
+
+# Parser engines: 'soup' is the original BeautifulSoup parser,
+# 'lxml' walks the lxml tree once and records <h2> offsets and the protocol
+# structure on the way, 'lxml-strict' is the lxml engine without either (same output as 'soup')
+PARSER_ENGINES = ('soup', 'lxml', 'lxml-strict')
+DEFAULT_ENGINE = 'lxml'
+
+# lxml reports source lines up to this value (libxml2 limit)
+MAX_SOURCE_LINE = 65535
+
+# Text in these elements is not part of the speech text (same as get_text())
+SKIP_TEXT_TAGS = {'style', 'script', 'template'}
+
+# Paragraph classes of the protocol layout (lxml engine).
+# Running page heads and the table of contents are dropped from the text
+# (the contents repeat every "Anf." header); the others are chamber business
+# that ends the speech before them.
+DROP_CLASSES = {'Kantrubrik', 'Innehll', 'TOC1', 'TOC2', 'TOC3'}
+END_CLASSES = {'Innehll', 'TOC1', 'TOC2', 'TOC3', 'Tryckort', 'Bordlggning', 'anmdat0', 'AnmDat',
+               'Beslut', 'Beslutsfattande', 'Partirster', 'Fredragning', 'Fredragning1', 'Muntligfrga'}
+# Unclassed or NormalIndent paragraphs are only checked when short
+MAX_CHAIR_LINE = 200
+# The chair closing a debate or recording a decision; ends the speech before it
+CHAIR_PATTERN = re.compile(r'(?:.*\bvar härmed avslutad\s*\.?|Kammaren (?:biföll|beslutade|godkände|medgav)\b.*|'
+                           r'Sammanträdet (?:ajournerades|återupptogs)\b.*|\(Beslut\b.*|Votering:|.*\bbordlades\.)')
+# Stage directions inside a speech, dropped from the text
+STAGE_DIRECTION_PATTERN = re.compile(r'\((?:Applåder|Munterhet|Ohörbart)[^()]*\)')
+
+# Compiled once at import instead of on every call
+# "Anf. NUMBER NAME (PARTY)" or "Anf. NUMBER NAME (PARTY):", allows multiple spaces/whitespace
+ANF_PATTERN = re.compile(r'Anf\.\s+(\d+)\s+(.{5,80}?)\s+\(([A-ZÅÄÖ]+)\)\s*:?')
+H2_PATTERN = re.compile(r'(?:Anf\.\s+(\d+)\s+)?(.{5,80}?)\s+\(([A-ZÅÄÖ]+)\)')
+# Titles like "Försvarsminister", "Statsråd", etc. in front of the name
+ANF_TITLE_PATTERN = re.compile(r'^(Försvarsminister|Statsråd|Minister|Statsminister|Talman)\s+', re.IGNORECASE)
+H2_TITLE_PATTERN = re.compile(r'^(Försvarsminister|Statsråd|Minister|Statsminister|Talman|Vice talman)\s+',
+                              re.IGNORECASE)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+# Soft hyphens sit in their own <span>, so they reach the text as "svens\n\xad\nka"
+SOFT_HYPHEN_PATTERN = re.compile(r'\s*\xad\s*')
+# "(S)", "(MP)", ...: any party code, whether or not it is part of a speaker header
+PARTY_CODE_PATTERN = re.compile(r'\([A-ZÅÄÖ]{1,2}\)')
+HTML_PAYLOAD_PATTERN = re.compile(r'<html>(.*?)</html>', re.DOTALL | re.IGNORECASE)
+
+def clean_speech_text(text):
+    """
+    Remove remaining HTML artifacts and collapse all whitespace to single spaces.
+    Soft hyphens are dropped with the whitespace around them, which rejoins the
+    split word. Otherwise the same result as the old re.sub chain (newlines,
+    whitespace runs, tags, whitespace runs, strip).
+    """
+    return ' '.join(SOFT_HYPHEN_PATTERN.sub('', TAG_PATTERN.sub('', text)).split())
+
+def find_anf_matches(full_text):
+    """PATTERN 1: "Anf. NUMBER NAME (PARTY)" or "Anf. NUMBER NAME (PARTY):" """
+
+    matches_anf = []
+    with timer('anf_regex'):
+        anf_iter = list(ANF_PATTERN.finditer(full_text))
+    count('anf_matches', len(anf_iter))
+
+    for match in anf_iter:
+        name_part = match.group(2).strip()
+        # Clean up titles like "Försvarsminister", "Statsråd", etc.
+        name_clean = ANF_TITLE_PATTERN.sub('', name_part)
         
+        matches_anf.append({
+            'pos': match.start(),
+            'speaker': name_clean.strip(),
+            'party': match.group(3).strip(),
+            'speech_num': match.group(1),
+            'match_end': match.end(),
+            'type': 'anf'
+        })
+
+    return matches_anf
+
+def h2_match(h2_text, h2_pos, h2_end):
+    """PATTERN 2: speaker info in an <h2> header; returns a match dict or None"""
+
+    h2_match = H2_PATTERN.search(h2_text)
+    if not h2_match:
+        return None
+
+    name_part = h2_match.group(2).strip() if h2_match.group(2) else ""
+    party = h2_match.group(3).strip()
+    speech_num = h2_match.group(1) if h2_match.group(1) else None
+
+    # Clean up titles like "Försvarsminister", "Statsråd", etc.
+    name_clean = H2_TITLE_PATTERN.sub('', name_part)
+    if not name_clean:
+        return None
+
+    return {
+        'pos': h2_pos,
+        'speaker': name_clean.strip(),
+        'party': party,
+        'speech_num': speech_num,
+        'match_end': h2_end,
+        'type': 'h2'
+    }
+
+def find_speakers_soup(html_decoded):
+    """Original engine: html.parser soup, get_text, then locate each <h2> with find()"""
+
+    with timer('build_tree'):
         soup = BeautifulSoup(html_decoded, 'html.parser')
+    with timer('get_text'):
         full_text = soup.get_text(separator='\n')
-        
-        # Now the text has real spaces instead of &#xa0;
-        
-        # PATTERN 1: "Anf. NUMBER NAME (PARTY)" or "Anf. NUMBER NAME (PARTY):"
-        # Allows multiple spaces/whitespace
-        pattern_anf = r'Anf\.\s+(\d+)\s+(.{5,80}?)\s+\(([A-ZÅÄÖ]+)\)\s*:?'
-        
-        matches_anf = []
-        for match in re.finditer(pattern_anf, full_text):
-            name_part = match.group(2).strip()
-            # Clean up titles like "Försvarsminister", "Statsråd", etc.
-            name_clean = re.sub(r'^(Försvarsminister|Statsråd|Minister|Statsminister|Talman)\s+', '', name_part, flags=re.IGNORECASE)
+    
+    # Now the text has real spaces instead of &#xa0;
+    matches_anf = find_anf_matches(full_text)
+    
+    # These are more reliable than just text patterns
+    h2_tags = soup.find_all('h2')
+
+    for h2 in h2_tags:
+        h2_text = h2.get_text()
+
+        # Get position in full_text
+        h2_pos = full_text.find(h2_text)
+        match = h2_match(h2_text, h2_pos, h2_pos + len(h2_text)) if h2_pos >= 0 else None
+
+        if match:
+            # Check not duplicate
+            is_dup = any(abs(h2_pos - m['pos']) < 5 for m in matches_anf)
             
-            matches_anf.append({
-                'pos': match.start(),
-                'speaker': name_clean.strip(),
-                'party': match.group(3).strip(),
-                'speech_num': match.group(1),
-                'match_end': match.end(),
-                'type': 'anf'
-            })
-        
-        # PATTERN 2: Look for <h2> tags which often contain speaker info
-        # These are more reliable than just text patterns
-        h2_tags = soup.find_all('h2')
-
-        for h2 in h2_tags:
-            h2_text = h2.get_text()
-            h2_match = re.search(r'(?:Anf\.\s+(\d+)\s+)?(.{5,80}?)\s+\(([A-ZÅÄÖ]+)\)', h2_text)
-            if h2_match:
-                name_part = h2_match.group(2).strip() if h2_match.group(2) else ""
-                party = h2_match.group(3).strip()
-                speech_num = h2_match.group(1) if h2_match.group(1) else None
-
-                # Clean up titles like "Försvarsminister", "Statsråd", etc.
-                name_clean = re.sub(r'^(Försvarsminister|Statsråd|Minister|Statsminister|Talman|Vice talman)\s+', '', name_part, flags=re.IGNORECASE)
-                
-                # Get position in full_text
-                h2_pos = full_text.find(h2_text)
-
-                if h2_pos >= 0 and name_clean:
-
-                    # Check not duplicate
-                    is_dup = any(abs(h2_pos - m['pos']) < 5 for m in matches_anf)
-                    
-                    if not is_dup:
-                        matches_anf.append({
-                            'pos': h2_pos,
-                            'speaker': name_clean.strip(),
-                            'party': party,
-                            'speech_num': speech_num,
-                            'match_end': h2_pos + len(h2_text),
-                            'type': 'h2'
-                    })
-        # Sort all matches by position
-        matches_anf.sort(key=lambda x: x['pos'])
-        # Extract speeches based on matches
-        for i, match_info in enumerate(matches_anf):
-            speaker = match_info['speaker']
-            party = match_info['party']
-            start_pos = match_info['match_end']
-
-            # Get text until next speech
-            if i + 1 < len(matches_anf):
-                end_pos = matches_anf[i + 1]['pos']
+            if not is_dup:
+                matches_anf.append(match)
+
+    return full_text, matches_anf, None
+
+def find_speakers_lxml(html_decoded, structured=True):
+    """
+    lxml engine: one walk over the tree builds the same text as
+    get_text(separator='\n') and records where every <h2> starts and ends,
+    so headers never have to be searched for in the full text.
+
+    The soup engine's find() only locates headers made of a single text
+    node, so in practice it never adds <h2> speakers. Here every header
+    becomes a speaker match, and the same walk records where speeches end:
+    every <h1> (§ section) and <h2> (including the chair's, which have no
+    party), chair lines such as "Överläggningen var härmed avslutad." and
+    business paragraphs (END_CLASSES). Running heads, stage directions and
+    the table of contents are left out of the text.
+    structured=False gives the soup engine's output.
+
+    Returns the text, the matches and (offsets, source lines) of the
+    boundaries in text order, or None without structure.
+    """
+
+    with timer('build_tree'):
+        root = lxml_html.document_fromstring(html_decoded)
+
+    pieces = []
+    offset = 0
+    # Text offset and source line of every piece, to map matches back to the raw file
+    piece_offsets = []
+    piece_lines = []
+    h2_start = None
+    h2_spans = []
+    boundary_offsets = []
+    boundary_lines = []
+    # (first piece, text offset) of the open <p>
+    paragraph = None
+
+    with timer('walk_tree'):
+        for event, element in etree.iterwalk(root, events=('start', 'end')):
+            tag = element.tag
+            is_text_element = isinstance(tag, str) and tag not in SKIP_TEXT_TAGS
+
+            if event == 'start':
+                if tag == 'h2' and h2_start is None:
+                    h2_start = offset
+                if structured:
+                    if tag in ('h1', 'h2') or (tag == 'p' and element.get('class') in END_CLASSES):
+                        boundary_offsets.append(offset)
+                        boundary_lines.append(element.sourceline)
+                    if tag == 'p':
+                        paragraph = (len(pieces), offset)
+                if is_text_element and element.text:
+                    piece_offsets.append(offset)
+                    piece_lines.append(element.sourceline)
+                    pieces.append(element.text)
+                    offset += len(element.text) + 1
             else:
-                end_pos = min(start_pos + 5000, len(full_text))
-            speech_text = full_text[start_pos:end_pos].strip()
-
-            # Clean
-            speech_text = re.sub(r'\n+', ' ', speech_text)
-            speech_text = re.sub(r'\s+', ' ', speech_text)
-
-            # Remove remaining HTML artifacts
-            speech_text = re.sub(r'<[^>]+>', '', speech_text)
-            speech_text = re.sub(r'\s+', ' ', speech_text).strip()
-
-            word_count = len(speech_text.split())
-
-            # Filter: only keep if substantial and speaker name looks valid
-            if word_count >= 30 and word_count <= 5000:
-                # Check speaker name is reasonable (2+ words, not too long)
-                speaker_words = speaker.split()
-                if 2 <= len(speaker_words) <= 6 :
-                    speeches.append({
-                        'speaker': speaker,
-                        'party': party,
-                        'text': speech_text,
-                        'word_count': word_count,
-                        'speech_number': match_info['speech_num'],
-                        
-                })
-    except Exception as e:
-        print(f"\nError: {e}")
-    
+                if tag == 'h2' and h2_start is not None:
+                    h2_spans.append((h2_start, max(h2_start, offset - 1)))
+                    h2_start = None
+                if tag == 'p' and paragraph is not None:
+                    first, start = paragraph
+                    paragraph = None
+                    action = paragraph_action(element, pieces, first, offset - start)
+                    if action == 'drop':
+                        del pieces[first:], piece_offsets[first:], piece_lines[first:]
+                        offset = start
+                    elif action == 'end':
+                        boundary_offsets.append(start)
+                        boundary_lines.append(element.sourceline)
+                if element.tail:
+                    # The tail follows the element, so its start line is a safe lower bound
+                    piece_offsets.append(offset)
+                    piece_lines.append(element.sourceline)
+                    pieces.append(element.tail)
+                    offset += len(element.tail) + 1
+
+        full_text = '\n'.join(pieces)
+    matches_anf = find_anf_matches(full_text)
+    if structured:
+        add_h2_matches(full_text, matches_anf, h2_spans)
+        count('boundaries', len(boundary_offsets))
+
+    for match in matches_anf:
+        i = bisect.bisect_right(piece_offsets, match['pos']) - 1
+        match['line'] = piece_lines[i] if i >= 0 else None
+
+    return full_text, matches_anf, (boundary_offsets, boundary_lines) if structured else None
+
+def paragraph_action(element, pieces, first, length):
+    """'drop' if a <p> is left out of the text, 'end' if it ends a speech, else None"""
+    css_class = element.get('class')
+    if css_class in DROP_CLASSES:
+        return 'drop'
+    if css_class in END_CLASSES or length > MAX_CHAIR_LINE:
+        return None
+
+    text = ' '.join(' '.join(pieces[first:]).split())
+    if STAGE_DIRECTION_PATTERN.fullmatch(text):
+        return 'drop'
+    if CHAIR_PATTERN.fullmatch(text):
+        return 'end'
+    return None
+
+def add_h2_matches(full_text, matches_anf, h2_spans):
+    """Speakers in <h2> headers that no Anf. match already covers"""
+
+    # Matches are in text order, so each header only needs the Anf. matches it spans
+    anf_positions = [m['pos'] for m in matches_anf]
+    for h2_pos, h2_end in h2_spans:
+        i = bisect.bisect_left(anf_positions, h2_pos)
+        if i < len(anf_positions) and anf_positions[i] < h2_end:
+            continue
+
+        match = h2_match(full_text[h2_pos:h2_end], h2_pos, h2_end)
+        if match:
+            matches_anf.append(match)
+            count('h2_matches')
+
+def speech_spans(full_text, matches_anf, boundaries=None):
+    """
+    (match, start, end, end line) of every speech: from the end of its speaker
+    match to the next match or the next boundary, whichever comes first, and
+    otherwise to the end of the text. Without boundaries (soup, lxml-strict)
+    the last speech keeps the old cut at 5000 characters.
+    """
+
+    # Sort all matches by position
+    matches_anf.sort(key=lambda x: x['pos'])
+    boundary_offsets, boundary_lines = boundaries or ([], [])
+
+    for i, match_info in enumerate(matches_anf):
+        start_pos = match_info['match_end']
+
+        # Get text until next speech
+        if i + 1 < len(matches_anf):
+            end_pos = matches_anf[i + 1]['pos']
+            end_line = matches_anf[i + 1].get('line')
+        elif boundaries is None:
+            end_pos = min(start_pos + 5000, len(full_text))
+            end_line = None
+        else:
+            end_pos = len(full_text)
+            end_line = None
+
+        # Boundaries are in text order: the first one at or after the start
+        b = bisect.bisect_left(boundary_offsets, start_pos)
+        if b < len(boundary_offsets) and boundary_offsets[b] < end_pos:
+            end_pos = boundary_offsets[b]
+            end_line = boundary_lines[b]
+
+        yield match_info, start_pos, end_pos, end_line
+
+def extract_speeches(full_text, matches_anf, boundaries=None):
+    """Cut the text into speeches between consecutive speaker matches and boundaries"""
+
+    speeches = []
+
+    for match_info, start_pos, end_pos, end_line in speech_spans(full_text, matches_anf, boundaries):
+        speaker = match_info['speaker']
+        party = match_info['party']
+        speech_text = clean_speech_text(full_text[start_pos:end_pos])
+
+        # Words are separated by exactly one space after cleaning
+        word_count = speech_text.count(' ') + 1 if speech_text else 0
+
+        # Filter: only keep if substantial and speaker name looks valid
+        if word_count >= 30 and word_count <= 5000:
+            # Check speaker name is reasonable (2+ words, not too long)
+            speaker_words = speaker.split()
+            if 2 <= len(speaker_words) <= 6 :
+                speeches.append({
+                    'speaker': speaker,
+                    'party': party,
+                    'text': speech_text,
+                    'word_count': word_count,
+                    'speech_number': match_info['speech_num'],
+                    # Lines of the <html> payload (lxml engines), turned into byte offsets later
+                    'line_start': match_info.get('line'),
+                    'line_end': end_line,
+            })
+
     return speeches
 
-def parse_riksdag_transcript(filepath):
-    """Parse speeches from Riksdag transcript text"""
+# Per-file indicators recorded while parsing, for finding files where speeches were missed
+FILE_FEATURES = ('length', 'has_html', 'text_length', 'party_codes', 'anf_markers', 'speaker_matches')
+
+def text_features(full_text, matches_anf):
+    """Indicators of speech content in the extracted text of one transcript"""
+    return {
+        'text_length': len(full_text),
+        'party_codes': len(PARTY_CODE_PATTERN.findall(full_text)),
+        'anf_markers': full_text.count('Anf.'),
+        'speaker_matches': len(matches_anf),
+    }
+
+def parse_riksdag_html(html_text, filename="", engine=DEFAULT_ENGINE, features=None):
+    """Parse speeches - handles HTML entities properly. Fills the features dict when given."""
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Errors are not caught here: parse_file_with_stats records them per file
+    # Decode HTML entities FIRST
+    with timer('unescape'):
+        html_decoded = html.unescape(html_text)
+
+    if engine in ('lxml', 'lxml-strict'):
+        full_text, matches_anf, boundaries = find_speakers_lxml(html_decoded, structured=(engine == 'lxml'))
+    else:
+        full_text, matches_anf, boundaries = find_speakers_soup(html_decoded)
+
+    with timer('extract_speeches'):
+        speeches = extract_speeches(full_text, matches_anf, boundaries)
+    if features is not None:
+        with timer('features'):
+            features.update(text_features(full_text, matches_anf))
 
-    metadata = extract_metadata_from_xml(content)
-    html_match = re.search(r'<html>(.*?)</html>', content, re.DOTALL | re.IGNORECASE)
+    return speeches
+
+def parse_transcript_content(content, filename="", engine=DEFAULT_ENGINE, features=None):
+    """Parse speeches from the text of one transcript file. Fills the features dict when given."""
+
+    with timer('metadata'):
+        metadata = extract_metadata_from_xml(content)
+    with timer('html_payload_regex'):
+        html_match = HTML_PAYLOAD_PATTERN.search(content)
+    if features is not None:
+        features.update({'length': len(content), 'has_html': html_match is not None})
     if html_match:
-        speeches = parse_riksdag_html(html_match.group(1), os.path.basename(filepath))
+        speeches = parse_riksdag_html(html_match.group(1), filename, engine, features)
+        with timer('byte_offsets'):
+            add_byte_offsets(speeches, content, html_match)
         for speech in speeches:
             speech.update(metadata)
         return speeches
     return []
 
-def process_all_transcripts(transcript_dir='data/raw/transcripts'):
+def add_byte_offsets(speeches, content, html_match):
+    """
+    Replace the payload line numbers of each speech with byte offsets into the
+    raw file: the start of the line holding its speaker header, and the start of
+    the line holding the next header or boundary (or the end of the <html> payload).
+    html.unescape keeps line breaks, so payload line n is file line first_line + n - 1.
+    """
+    if not any(speech['line_start'] for speech in speeches):
+        for speech in speeches:
+            speech['byte_start'] = speech['byte_end'] = None
+            del speech['line_start'], speech['line_end']
+        return
+
+    data = content.encode('utf-8')
+    line_starts = np.concatenate(([0], np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 10) + 1))
+    first_line = content.count('\n', 0, html_match.start(1))
+    payload_end = len(content[:html_match.end(1)].encode('utf-8'))
+
+    def byte_offset(line):
+        # libxml2 stops counting lines at 65535
+        if line is None or line >= MAX_SOURCE_LINE:
+            return None
+        return int(line_starts[first_line + line - 1])
+
+    for speech in speeches:
+        speech['byte_start'] = byte_offset(speech.pop('line_start'))
+        line_end = speech.pop('line_end')
+        speech['byte_end'] = payload_end if line_end is None else byte_offset(line_end)
+
+def parse_riksdag_transcript(filepath, engine=DEFAULT_ENGINE):
+    """Parse speeches from Riksdag transcript text"""
+    
+    content = read_transcript(filepath)
+
+    return parse_transcript_content(content, os.path.basename(filepath), engine)
+
+def parse_file_with_stats(filepath, engine=DEFAULT_ENGINE, cache=None, archive_path=None, record=False):
+    """
+    Parse one file for process_all_transcripts; never raises, errors go into the stats.
+    With archive_path, filepath only names the document and its content comes from the archive.
+    With record, timers and counters for this file are returned in stats['recorder'].
+    """
+
+    recorder = Recorder() if record else None
+    with recording(recorder):
+        speeches, stats = _parse_file_with_stats(filepath, engine, cache, archive_path)
+
+    if recorder:
+        stats['recorder'] = recorder.snapshot()
+    return speeches, stats
+
+def _parse_file_with_stats(filepath, engine, cache, archive_path):
+    filename = os.path.basename(filepath)
+
+    try:
+        with timer('read'):
+            if archive_path:
+                archive = open_archive(archive_path)
+                dok_id = os.path.splitext(filename)[0]
+                data = archive.get_bytes(dok_id)
+                # Hash recorded when packing: no need to hash the content again
+                digest = archive.digest(dok_id) if cache else None
+            else:
+                with open(filepath, 'rb') as f:
+                    data = f.read()
+                digest = content_hash(data) if cache else None
+
+        with timer('cache_get'):
+            entry = cache.get(digest) if cache else None
+        cached = entry is not None
+
+        if cached:
+            speeches, features = entry['speeches'], entry['features']
+        else:
+            with timer('decode'):
+                content = str(data, 'utf-8')
+            features = {}
+            speeches = parse_transcript_content(content, filename, engine, features)
+            # Only reached when parsing succeeded: a failed parse is never cached
+            if cache:
+                with timer('cache_put'):
+                    cache.put(digest, {'speeches': speeches, 'features': features})
+
+        count('files')
+        count('bytes', len(data))
+        count('speeches', len(speeches))
+        count('cache_hits', int(cached))
+
+        return speeches, {'file': filename, 'speeches': len(speeches), 'error': '', 'cached': cached, **features}
+    except Exception as e:
+        return [], {'file': filename, 'speeches': 0, 'error': f"{type(e).__name__}: {e}", 'cached': False}
+
+def list_transcripts(transcript_dir='data/raw/transcripts'):
+    """Transcript paths in sorted order"""
+    files = sorted(f for f in os.listdir(transcript_dir) 
+                   if f.endswith('.txt') and f != 'failed_downloads.txt')
+    return [os.path.join(transcript_dir, f) for f in files]
+
+def process_all_transcripts(transcript_dir='data/raw/transcripts', workers=1, chunksize=4,
+                            engine=DEFAULT_ENGINE, use_cache=True, cache_dir=CACHE_DIR,
+                            archive_path=ARCHIVE_FILE):
     """Process all transcript files in a directory and save to CSV"""
 
-    files = [f for f in os.listdir(transcript_dir) 
-             if f.endswith('.txt') and f != 'failed_downloads.txt']
+    # Unchanged files parsed by the same parser version come from the cache
+    cache = ParseCache(cache_dir, f"{PARSER_VERSION}.{engine}") if use_cache else None
+
+    # Sorted so the output order is the same for any number of workers
+    filepaths = list_transcripts(transcript_dir)
+
+    # Read from the packed archive when it holds exactly these transcripts
+    if archive_path and TranscriptArchive.exists(archive_path):
+        if open_archive(archive_path).is_current(transcript_dir):
+            print(f"\n📦 Reading transcripts from {archive_path}")
+        else:
+            print(f"\n⚠️  {archive_path} is out of date, reading the files instead "
+                  f"(re-pack with: python scripts/transcript_archive.py pack)")
+            archive_path = None
+    else:
+        archive_path = None
     
-    print(f"\n📝 Processing {len(files)} files...\n")
+    print(f"\n📝 Processing {len(filepaths)} files with {workers} worker(s), {engine} engine...\n")
     
     all_speeches = []
     file_stats = []
 
-    for filename in tqdm(files, desc="Parsing"):
-        filepath = os.path.join(transcript_dir, filename)
+    # Workers record per file; the totals are merged into the active run report
+    record = is_recording()
+    parse = partial(parse_file_with_stats, engine=engine, cache=cache, archive_path=archive_path, record=record)
+
+    def collect(speeches, stats):
+        if record:
+            merge_snapshot(stats.pop('recorder'))
+        file_stats.append(stats)
+        all_speeches.extend(speeches)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() hands out files in chunks and returns results in input order
+            results = pool.map(parse, filepaths, chunksize=chunksize)
+
+            for speeches, stats in tqdm(results, total=len(filepaths), desc="Parsing"):
+                collect(speeches, stats)
+    else:
+        for filepath in tqdm(filepaths, desc="Parsing"):
+            collect(*parse(filepath))
+
+    if cache:
+        hits = sum(1 for stats in file_stats if stats['cached'])
+        print(f"\n📦 Cache: {hits}/{len(file_stats)} files loaded, {len(file_stats) - hits} parsed")
+        cache.evict()
+
+    errors = sum(1 for stats in file_stats if stats['error'])
+    if errors:
+        print(f"\n⚠️  {errors} files failed to parse (see 'error' column in file stats)")
 
-        try:
-            speeches = parse_riksdag_transcript(filepath)
-            file_stats.append({
-                'file': filename,
-                'speeches': len(speeches)
-            })
-            all_speeches.extend(speeches)
-        except:
-            file_stats.append({
-                'file': filename,   
-                'speeches': 0
-            })
     return pd.DataFrame(all_speeches), pd.DataFrame(file_stats)
 
+def without_offsets(speech):
+    return {k: v for k, v in speech.items() if k not in ('byte_start', 'byte_end')}
+
+def compare_engines(transcript_dir='data/raw/transcripts', engines=('soup', 'lxml-strict')):
+    """Parity check: parse every transcript with both engines and report files that differ"""
+
+    baseline, candidate = engines
+    mismatches = []
+
+    for filepath in tqdm(list_transcripts(transcript_dir), desc="Comparing"):
+        # Only the lxml engines have byte offsets, so they are left out of the comparison
+        expected = [without_offsets(s) for s in parse_riksdag_transcript(filepath, baseline)]
+        actual = [without_offsets(s) for s in parse_riksdag_transcript(filepath, candidate)]
+
+        if expected != actual:
+            mismatches.append({
+                'file': os.path.basename(filepath),
+                baseline: len(expected),
+                candidate: len(actual),
+                'same_speakers': [s['speaker'] for s in expected] == [s['speaker'] for s in actual],
+            })
+
+    return pd.DataFrame(mismatches)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse Riksdag transcripts into speeches")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Parallel parser processes (1 = sequential)")
+    parser.add_argument('--engine', choices=PARSER_ENGINES, default=DEFAULT_ENGINE,
+                        help="Speech extractor engine")
+    parser.add_argument('--compare-engines', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        choices=PARSER_ENGINES,
+                        help="Parse all transcripts with two engines, report files that differ, then exit")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-parse every transcript instead of using the parse cache")
+    parser.add_argument('--no-csv', action='store_true',
+                        help="Only write the Parquet dataset, not all_speeches.csv")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="Read the loose transcript files even if a packed archive exists")
+    parser.add_argument('--yes', action='store_true',
+                        help="Skip the test file and the confirmation prompt (for unattended runs)")
+    parser.add_argument('--profile', nargs='+', choices=['cpu', 'memory'], default=None,
+                        help="Add a cProfile and/or tracemalloc summary to the run report "
+                             "(cpu only sees the parser internals with --workers 1)")
+    args = parser.parse_args()
+
+    if args.compare_engines:
+        mismatches = compare_engines(engines=args.compare_engines)
+        if len(mismatches) == 0:
+            print(f"\n✅ {' and '.join(args.compare_engines)} agree on every transcript")
+        else:
+            print(f"\n❌ {len(mismatches)} transcripts differ:")
+            print(mismatches.to_string(index=False))
+        raise SystemExit(1 if len(mismatches) else 0)
+
     print("=" * 70)
     print("FINAL WORKING PARSER (HTML entity aware)")
     print("=" * 70)
     
-    #Test
-    print("\n🧪 Testing HC0940.txt...\n")
+    if args.yes:
+        proceed = 'y'
+    else:
+        #Test
+        print("\n🧪 Testing HC0940.txt...\n")
 
-    test_file = 'data/raw/transcripts/HC0940.txt'
-    speeches = parse_riksdag_transcript(test_file)
+        test_file = 'data/raw/transcripts/HC0940.txt'
+        speeches = parse_riksdag_transcript(test_file, args.engine)
 
-    print(f"✅ Found {len(speeches)} speeches\n")
+        print(f"✅ Found {len(speeches)} speeches\n")
 
-    if len(speeches) > 0:
-        print("Speeches found:")
-        print("-" * 70)
-        for i, s in enumerate(speeches[:10], 1):
-            print(f"{i}. {s['speaker']} ({s['party']}) - {s['word_count']} words")
-            print(f"   {s['text'][:100]}...")
-            print()
+        if len(speeches) > 0:
+            print("Speeches found:")
+            print("-" * 70)
+            for i, s in enumerate(speeches[:10], 1):
+                print(f"{i}. {s['speaker']} ({s['party']}) - {s['word_count']} words")
+                print(f"   {s['text'][:100]}...")
+                print()
 
-    print("-" * 70)
-    proceed = input("Process ALL transcripts in 'data/raw/transcripts'? (y/n): ")
+        print("-" * 70)
+        proceed = input("Process ALL transcripts in 'data/raw/transcripts'? (y/n): ")
 
     if proceed.lower() == 'y':
-        speeches_df, stats_df = process_all_transcripts()
+        report = RunReport('04_parse_speeches', profile=args.profile).start()
+        report.set('engine', args.engine)
+        report.set('workers', args.workers)
+        report.set('cache', not args.no_cache)
+
+        speeches_df, stats_df = process_all_transcripts(workers=args.workers, engine=args.engine,
+                                                        use_cache=not args.no_cache,
+                                                        archive_path=None if args.no_archive else ARCHIVE_FILE)
 
         if len(speeches_df) > 0:
             print("\n" + "=" * 70)
@@ -214,6 +686,13 @@ if __name__ == "__main__":
             print("=" * 70)
 
             speeches_df['year'] = pd.to_datetime(speeches_df['datum']).dt.year
+            # Stable row id (files are processed in sorted order) for joining analysis output
+            speeches_df.insert(0, 'speech_id', range(len(speeches_df)))
+            # One id per person across title, case and suffix variants of the header
+            with timer('resolve_speakers'):
+                speaker_ids, people = resolve_speakers(speeches_df['speaker'], speeches_df['party'],
+                                                       load_speaker_ids(SPEAKERS_CSV))
+            speeches_df.insert(speeches_df.columns.get_loc('speaker') + 1, 'speaker_id', speaker_ids)
 
             print(f"\n📊 TOTAL: {len(speeches_df):,} speeches")
             print(f"\n📅 BY YEAR:")
@@ -221,6 +700,8 @@ if __name__ == "__main__":
             for y,c in speeches_df['year'].value_counts().sort_index().items():
                 print(f"  {y}: {c:,}")
             
+            print(f"\n🧑 SPEAKERS: {len(people):,} people ({speeches_df['speaker'].nunique():,} header variants)")
+
             print(f"\n🎭 BY PARTY:")
             for p, c in speeches_df['party'].value_counts().items():
                 print(f"  {p}: {c:,} ({c/len(speeches_df)*100:.1f}%)")
@@ -229,9 +710,34 @@ if __name__ == "__main__":
             print(f"  With speeches: {(stats_df['speeches']>0).sum()}/{len(stats_df)}")
             print(f"  Mean/file: {stats_df['speeches'].mean():.1f}")
 
-            # Save to CSV
-            speeches_df.to_csv('data/processed/all_speeches.csv', index=False,encoding='utf-8')
-            stats_df.to_csv('data/processed/file_stats.csv', index=False)
+            # Byte ranges go into the speech index, not into the speech tables
+            with timer('write_index'):
+                SpeechIndex.build(speeches_df).save()
+            speeches_df = speeches_df.drop(columns=['byte_start', 'byte_end'])
+            print(f"\n✅ Saved: {SPEECH_INDEX_FILE}")
+
+            # Columnar dataset for the analysis scripts
+            if has_pyarrow():
+                with timer('write_parquet'):
+                    write_speeches(speeches_df)
+                print(f"\n✅ Saved: {SPEECHES_DATASET}/")
+            else:
+                print("\n⚠️  pyarrow not installed - skipping Parquet output")
+
+            # Integer-coded copy with the text in one blob, for the analysis scripts
+            with timer('write_compact'):
+                CompactSpeechStore.build(speeches_df).save()
+            print(f"✅ Saved: {COMPACT_DIR}/")
+
+            # CSV export (Kaggle dataset)
+            if not args.no_csv:
+                with timer('write_csv'):
+                    speeches_df.to_csv(SPEECHES_CSV, index=False,encoding='utf-8')
+                print(f"✅ Saved: {SPEECHES_CSV}")
+            stats_df.to_csv(FILE_STATS_CSV, index=False)
+            people.assign(variants=people['variants'].str.join(' | ')).to_csv(SPEAKERS_CSV, index=False)
+            print(f"✅ Saved: {SPEAKERS_CSV}")
+
+            print("\n🎉 DONE! Ready for analysis!")
 
-            print(f"\n✅ Saved: data/processed/all_speeches.csv")
-            print("\n🎉 DONE! Ready for analysis!")
\ No newline at end of file
+        report.finish()
\ No newline at end of file
@@ -2,12 +2,19 @@
 
 Generate descriptive statistics for supervisor-level data.
 """
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from compact_store import load_speeches
+from instrumentation import RunReport
 
-# Load data
-df = pd.read_csv('data/processed/all_speeches.csv')
+report = RunReport('05_descriptives_for_supervisors').start()
+
+# Load data - only the columns used here, the text column is never read.
+# From the interned store the string columns are categoricals over integer
+# codes, so the groupbys below run on integer keys
+with report.timer('load'):
+    df = load_speeches(columns=['speaker', 'speaker_id', 'party', 'dok_id', 'datum', 'year', 'word_count'])
+report.count('speeches', len(df))
 
 print("=" * 70)
 print("DESCRIPTIVE STATISTICS FOR SUPERVISORS")
@@ -15,17 +22,19 @@ print("=" * 70)
 
 print(f"\n📊 DATASET OVERVIEW:")
 print(f"Total speeches: {len(df):,}")
-print(f"Date range: {df['datum'].min()} to {df['datum'].max()}")
-print(f"Unique speakers: {df['speaker'].nunique():,}")
+dates = df['datum'].astype(str)
+print(f"Date range: {dates.min()} to {dates.max()}")
+# Resolved people, not header variants ("Statsrådet X" and "X" are one speaker)
+print(f"Unique speakers: {df['speaker_id'].nunique():,}")
 print(f"Unique debates: {df['dok_id'].nunique():,}")
 
 print(f"\n📅 SPEECHES BY YEAR:")
-yearly = df.groupby('year').size()
+yearly = df.groupby('year', observed=True).size()
 for year, count in yearly.items():
     print(f"  {year}: {count:,} speeches")
 
 print(f"\n🎭 SPEECHES BY PARTY:")
-party_counts = df.groupby('party').size().sort_values(ascending=False)
+party_counts = df.groupby('party', observed=True).size().sort_values(ascending=False)
 for party, count in party_counts.items():
     pct = count / len(df) * 100
     print(f"  {party}: {count:,} speeches ({pct:.1f}%)")
@@ -60,14 +69,15 @@ axes[1, 0].axvline(df['word_count'].mean(), color='red', linestyle='--', label=f
 axes[1, 0].legend() 
 
 # 4. Parties activity over time
-party_year = df.groupby(['year','party']).size().unstack(fill_value=0)
+party_year = df.groupby(['year','party'], observed=True).size().unstack(fill_value=0)
 sns.heatmap(party_year.T, ax=axes[1, 1], cmap='YlGnBu', cbar_kws={'label': 'Number of Speeches'},fmt='d')
 axes[1, 1].set_title('Party Activity Over Time', fontsize=12, fontweight='bold')    
 axes[1, 1].set_xlabel('Year')
 axes[1, 1].set_ylabel('Party')
 
-plt.tight_layout()
-plt.savefig('output/figures/descriptive_statistics.png', dpi=300, bbox_inches='tight')
+with report.timer('plot'):
+    plt.tight_layout()
+    plt.savefig('output/figures/descriptive_statistics.png', dpi=300, bbox_inches='tight')
 print(f"\n✅ Visualization saved: output/figures/descriptive_statistics.png")
 
 # Summary for presentation
@@ -87,4 +97,6 @@ NEXT STEPS:
 - Identify sentences where parties mention other parties
 - Apply Swedish sentiment dictionary
 - Calculate negativity scores over time
-""")
\ No newline at end of file
+""")
+
+report.finish()
\ No newline at end of file
@@ -1,82 +1,132 @@
 """
 Identify Opponent References in Speeches
+By default the whole corpus is loaded at once. With --chunked the speeches
+are streamed in batches: mentions are detected per batch, the opponent
+matrix and party rates are summed up as it goes, and only the new columns
+(keyed by speech_id) are written, so memory no longer grows with the corpus.
 """
 
-import pandas as pd
-import re
+import argparse
 from tqdm import tqdm
+from party_mentions import (opponent_mentions, mentioned_party_labels, corpus_mention_counts,
+                            opponent_matrix as build_opponent_matrix)
+from token_store import TokenizedCorpus
+from instrumentation import RunReport
+from speech_store import (read_speeches, write_table, has_pyarrow, iter_speech_batches, ChunkedWriter,
+                          OPPONENTS_DATASET, OPPONENTS_CSV)
+
+ID_COLUMNS = ['speech_id', 'dok_id', 'speaker', 'party', 'year']
+RESULT_COLUMNS = ['has_opponent_ref', 'mentioned_parties']
+NO_SPEECHES = "❌ No speeches to analyze: run 04_parse_speeches.py first"
+# Per-speech results (no text): Parquet, or a CSV without pyarrow
+RESULTS_PATH = OPPONENTS_DATASET if has_pyarrow() else OPPONENTS_CSV
+
+def detect_mentions(speeches, corpus=None, corpus_counts=None):
+    """Opponent mentions of the speeches, from the token store when it covers them, else from the text"""
+    rows = corpus.rows_for(speeches['speech_id']) if corpus is not None else None
+
+    if rows is not None:
+        return opponent_mentions(None, speeches['party'], counts=corpus_counts[rows]), 'token_store'
+    return opponent_mentions(speeches['text'], speeches['party']), 'regex'
+
+def analyze_in_chunks(batch_size, report):
+    """
+    One streaming pass over the speeches. Returns the opponent matrix and the
+    per-party (sum, count) table; the per-speech results go to RESULTS_PATH.
+    """
+    corpus = TokenizedCorpus.load_current()
+    corpus_counts = corpus_mention_counts(corpus) if corpus is not None else None
+
+    # The text is only needed when there is no token store to count from
+    columns = ID_COLUMNS + (['text'] if corpus is None else [])
+    writer = ChunkedWriter(RESULTS_PATH, ID_COLUMNS + RESULT_COLUMNS)
+
+    matrix = None
+    party_counts = None
+    sources = set()
+
+    try:
+        for batch in tqdm(iter_speech_batches(columns, batch_size), desc="Batches"):
+            with report.timer('detect_mentions'):
+                mentions, source = detect_mentions(batch, corpus, corpus_counts)
+            if source == 'regex' and 'text' not in batch.columns:
+                raise RuntimeError("Token store does not cover the speeches; rebuild it (token_store.py build)")
+            sources.add(source)
+            report.count('speeches', len(batch))
+            report.count('opponent_mentions', mentions.nnz)
+
+            batch['has_opponent_ref'] = mentions.getnnz(axis=1) > 0
+            batch['mentioned_parties'] = mentioned_party_labels(mentions)
+
+            chunk_matrix = build_opponent_matrix(mentions, batch['party'])
+            matrix = chunk_matrix if matrix is None else matrix + chunk_matrix
+
+            chunk_counts = batch.groupby('party', observed=True)['has_opponent_ref'].agg(['sum', 'count'])
+            party_counts = chunk_counts if party_counts is None else party_counts.add(chunk_counts, fill_value=0)
+
+            with report.timer('write'):
+                writer.write(batch)
+    finally:
+        writer.close()
+
+    # No batches at all: nothing was summed up
+    if party_counts is None:
+        raise SystemExit(NO_SPEECHES)
+
+    report.set('source', ','.join(sorted(sources)))
+    return matrix, party_counts.astype(int), writer.path
+
+parser = argparse.ArgumentParser(description="Identify opponent references in speeches")
+parser.add_argument('--chunked', action='store_true',
+                    help="Stream the speeches in batches instead of loading the whole corpus")
+parser.add_argument('--batch-size', type=int, default=20000, help="Speeches per batch with --chunked")
+args = parser.parse_args()
 
 print("=" * 70)
 print("06. IDENTIFYING OPPONENT REFERENCES IN SPEECHES")
 print("=" * 70)
 
-# Load Speeches Data
-
-df = pd.read_csv('data/processed/all_speeches.csv')
-
-# Party keywords in Swedish
-PARTY_KEYWORDS = {
-    'S': ['socialdemokrat', 'socialdemokraterna', 'sossarna', 's-parti'],
-    'M': ['moderat', 'moderaterna', 'm-parti'],
-    'SD': ['sverigedemokrat', 'sverigedemokraterna', 'sd-parti', 'sd'],
-    'V': ['vänsterparti', 'vänsterpartiet', 'vänstern', 'v-parti'],
-    'C': ['centerparti', 'centerpartiet', 'centern', 'c-parti'],
-    'L': ['liberal', 'liberalerna', 'l-parti'],
-    'MP': ['miljöparti', 'miljöpartiet', 'gröna', 'de gröna', 'mp'],
-    'KD': ['kristdemokrat', 'kristdemokraterna', 'kd-parti', 'kd']
-}
-
-# Bloc keywords
-BLOC_KEYWORDS = {
-    'left_bloc': ['vänsterblocket', 'rödgröna'],
-    'right_bloc': ['högerblocket', 'alliansen', 'borgerliga'],
-    'government': ['regeringen', 'regeringspartierna'],
-    'opposition': ['oppositionen']
-}
-
-def detect_party_mentions(text, speaker_party):
-    """
-    Detect which parties are mentioned in the text
-    Returns list of mentioned parties (excluding speaker's own party)
-    """
-    text_lower = text.lower()
-    mentioned_parties = []
-    
-    for party, keywords in PARTY_KEYWORDS.items():
-        if party == speaker_party:
-            continue  # Don't count mentions of own party
-        
-        for keyword in keywords:
-            if keyword in text_lower:
-                mentioned_parties.append(party)
-                break  # Found this party, move to next
-    
-    return list(set(mentioned_parties))  # Remove duplicates
-
-def has_opponent_reference(text, speaker_party):
-    """Check if speech mentions any opponent"""
-    mentions = detect_party_mentions(text, speaker_party)
-    return len(mentions) > 0
-
-# Process speeches to identify opponent references
-print("\n🔍 Analyzing opponent references...")
-
-df['has_opponent_ref'] = False
-df['mentioned_parties'] = ''
-
-for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing"):
-    text = row['text']
-    party = row['party']
-    
-    # Check for opponent mentions
-    mentioned = detect_party_mentions(text, party)
-
-    df.at[idx, 'has_opponent_ref'] = len(mentioned) > 0
-    df.at[idx, 'mentioned_parties'] = ','.join(mentioned) if mentioned else ''
+report = RunReport('06_opponent_references').start()
+report.set('chunked', args.chunked)
+
+if args.chunked:
+    print(f"\n🔍 Analyzing opponent references in batches of {args.batch_size:,}...")
+    opponent_matrix, party_opponent_rates, results_path = analyze_in_chunks(args.batch_size, report)
+    total_speeches = int(party_opponent_rates['count'].sum())
+    opponent_speeches = int(party_opponent_rates['sum'].sum())
+else:
+    # Load Speeches Data
+
+    with report.timer('load'):
+        df = read_speeches()
+    report.count('speeches', len(df))
+    if len(df) == 0:
+        raise SystemExit(NO_SPEECHES)
+
+    # Process speeches to identify opponent references
+    print("\n🔍 Analyzing opponent references...")
+
+    # Keyword hits from the tokenized corpus when it is built, otherwise one
+    # regex pass over the whole text column, straight into a sparse matrix
+    with report.timer('detect_mentions'):
+        corpus = TokenizedCorpus.load_current()
+        mentions, source = detect_mentions(df, corpus, corpus_mention_counts(corpus) if corpus is not None else None)
+        if source == 'token_store':
+            print("🔤 Using tokenized corpus store")
+    report.set('source', source)
+    report.count('opponent_mentions', mentions.nnz)
+
+    df['has_opponent_ref'] = mentions.getnnz(axis=1) > 0
+    df['mentioned_parties'] = mentioned_party_labels(mentions)
+
+    total_speeches = len(df)
+    opponent_speeches = df['has_opponent_ref'].sum()
+    party_opponent_rates = df.groupby('party', observed=True)['has_opponent_ref'].agg(['sum', 'count'])
+
+    # Create matrix
+    opponent_matrix = build_opponent_matrix(mentions, df['party'])
 
 # Calculate Statistics
-total_speeches = len(df)
-opponent_speeches = df['has_opponent_ref'].sum()    
 opponent_pct = opponent_speeches / total_speeches * 100
 
 print("\n" + "=" * 70)
@@ -90,7 +140,6 @@ print(f"   Percentage : {opponent_pct:.1f}%")
 
 print(f"\n🎭 BY PARTY (How often each party mentions opponents):")
 
-party_opponent_rates = df.groupby('party')['has_opponent_ref'].agg(['sum', 'count'])
 party_opponent_rates['pct'] = (party_opponent_rates['sum'] / party_opponent_rates['count'] * 100)
 party_opponent_rates = party_opponent_rates.sort_values('pct', ascending=False)
 
@@ -101,26 +150,23 @@ for party, row in party_opponent_rates.iterrows():
 print(f"\n🔗 OPPONENT MENTION MATRIX:")
 print("(Rows = Speaker Party, Columns = Mentioned Party)")
 
-# Create matrix
-opponent_matrix = pd.DataFrame(0, index=PARTY_KEYWORDS.keys(), columns=PARTY_KEYWORDS.keys())
-
-for idx, row in df.iterrows():
-    if row['mentioned_parties']:
-        speaker = row['party']
-        mentioned = row['mentioned_parties'].split(',')
-        
-        for target in mentioned:
-            if target in opponent_matrix.columns:
-                opponent_matrix.at[speaker, target] += 1
-
 print("\n" + opponent_matrix.to_string())
 
 # Save Results
-df.to_csv('data/processed/speeches_with_opponents.csv', index=False, encoding='utf-8')
-opponent_matrix.to_csv('output/tables/opponent_matrix.csv')
+with report.timer('write'):
+    opponent_matrix.to_csv('output/tables/opponent_matrix.csv')
+
+    if not args.chunked:
+        # Same columns as the chunked path, without the text, for 07 and later analysis
+        id_cols = [c for c in ID_COLUMNS if c in df.columns]
+        results_path = RESULTS_PATH
+        if has_pyarrow():
+            write_table(df[id_cols + RESULT_COLUMNS], results_path)
+        else:
+            df[id_cols + RESULT_COLUMNS].to_csv(results_path, index=False, encoding='utf-8')
 
 print(f"\n✅ Saved:")
-print(f"  - data/processed/speeches_with_opponents.csv")
+print(f"  - {results_path}")
 print(f"  - output/tables/opponent_matrix.csv")
 
 # Visualization
@@ -143,8 +189,9 @@ axes[1].set_title('Who Mentions Whom', fontweight='bold')
 axes[1].set_xlabel('Mentioned Party')
 axes[1].set_ylabel('Speaker Party')
 
-plt.tight_layout()
-plt.savefig('output/figures/opponent_references.png', dpi=300, bbox_inches='tight')
+with report.timer('plot'):
+    plt.tight_layout()
+    plt.savefig('output/figures/opponent_references.png', dpi=300, bbox_inches='tight')
 
 print(f"  - output/figures/opponent_references.png")
 
@@ -152,6 +199,8 @@ print("\n" + "=" * 70)
 print("✅ OPPONENT ANALYSIS COMPLETE!")
 print("=" * 70)
 
+report.finish()
+
 
       
     
\ No newline at end of file
@@ -4,14 +4,21 @@ Create summary for supervisor presentation
 """
 
 import pandas as pd
+from speech_store import read_table, OPPONENTS_DATASET, OPPONENTS_CSV
+from instrumentation import RunReport
+
+report = RunReport('07_presentation_summary').start()
 
 print("=" * 70)
 print("SUMMARY FOR SUPERVISORS")
 print("=" * 70)
 
 # Load data
-speeches = pd.read_csv('data/processed/speeches_with_opponents.csv')
-opponent_matrix = pd.read_csv('output/tables/opponent_matrix.csv', index_col=0)
+with report.timer('load'):
+    speeches = read_table(OPPONENTS_DATASET, columns=['year', 'party', 'has_opponent_ref'],
+                          csv_path=OPPONENTS_CSV)
+    opponent_matrix = pd.read_csv('output/tables/opponent_matrix.csv', index_col=0)
+report.count('speeches', len(speeches))
 
 print(f"""
 DATA COLLECTION COMPLETE
@@ -24,14 +31,14 @@ DATA COLLECTION COMPLETE
 Coverage by Year:
 """)
 
-yearly = speeches.groupby('year').size()
+yearly = speeches.groupby('year', observed=True).size()
 for year, count in yearly.items():
     print(f"  {year}: {count:,} speeches")
 
 print(f"""
 Coverage by Party:
 """)
-party = speeches.groupby('party').size().sort_values(ascending=False)
+party = speeches.groupby('party', observed=True).size().sort_values(ascending=False)
 for p, count in party.items():
     pct = count / len(speeches) * 100
     print(f"  {p}: {count:,} ({pct:.1f}%)")
@@ -51,7 +58,7 @@ OPPONENT REFERENCES IDENTIFIED
 Most Active in Mentioning Opponents:
 """)
 
-top_mentioners = speeches.groupby('party')['has_opponent_ref'].mean().sort_values(ascending=False).head(5)
+top_mentioners = speeches.groupby('party', observed=True)['has_opponent_ref'].mean().sort_values(ascending=False).head(5)
 for party, rate in top_mentioners.items():
     print(f"  {party}: {rate*100:.1f}% of their speeches")  
 
@@ -76,9 +83,13 @@ NEXT STEPS
 
 FILES GENERATED:
 - data/processed/all_speeches.csv
-- data/processed/speeches_with_opponents.csv
+- data/processed/speeches_parquet/ (columnar, partitioned by year)
+- data/processed/speeches_compact/ (interned speakers/parties/debates, text blob)
+- data/processed/opponent_refs.parquet (speeches_with_opponents.csv without pyarrow)
 - output/figures/basic_stats.png
 - output/figures/opponent_references.png
 - output/tables/opponent_matrix.csv
 """
-)
\ No newline at end of file
+)
+
+report.finish()
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Extract Sentences Where Parties Mention Other Parties
+Streams the speeches in batches, splits each speech into sentences and
+keeps only sentences that mention an opponent party. Output is written
+chunk by chunk, so memory use does not grow with the corpus.
+"""
+import argparse
+import pandas as pd
+from tqdm import tqdm
+from party_mentions import opponent_sentences
+from speech_store import iter_speech_batches, ChunkedWriter
+
+OUTPUT_FILE = 'data/processed/opponent_sentences.parquet'
+OUTPUT_COLUMNS = ['speech_id', 'dok_id', 'speech_number', 'party', 'sentence_start',
+                  'sentence_end', 'target_party', 'sentence']
+
+def extract_batch(batch):
+    """Opponent sentences for one batch of speeches, one row per (sentence, target party)"""
+    records = []
+
+    for speech_id, dok_id, speech_number, party, text in zip(
+            batch['speech_id'], batch['dok_id'], batch['speech_number'], batch['party'], batch['text']):
+        if not isinstance(text, str):
+            continue
+
+        for start, end, target in opponent_sentences(text, party):
+            records.append({
+                'speech_id': int(speech_id),
+                'dok_id': str(dok_id),
+                'speech_number': '' if pd.isna(speech_number) else str(speech_number),
+                'party': str(party),
+                'sentence_start': start,
+                'sentence_end': end,
+                'target_party': target,
+                'sentence': text[start:end],
+            })
+
+    return pd.DataFrame(records, columns=OUTPUT_COLUMNS)
+
+def extract_opponent_sentences(output_file=OUTPUT_FILE, batch_size=5000):
+    """Stream all speeches through the sentence extractor; returns (speeches, sentences) counts"""
+    columns = ['speech_id', 'dok_id', 'speech_number', 'party', 'text']
+    writer = ChunkedWriter(output_file, OUTPUT_COLUMNS)
+    speeches = 0
+
+    try:
+        for batch in tqdm(iter_speech_batches(columns, batch_size), desc="Batches"):
+            writer.write(extract_batch(batch))
+            speeches += len(batch)
+    finally:
+        writer.close()
+
+    return speeches, writer.rows, writer.path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract opponent-mentioning sentences")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Speeches per batch")
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("08. EXTRACTING OPPONENT SENTENCES")
+    print("=" * 70)
+
+    speeches, sentences, path = extract_opponent_sentences(args.output, args.batch_size)
+
+    print(f"\n📊 Speeches processed: {speeches:,}")
+    print(f"💬 Opponent sentences: {sentences:,}")
+    print(f"\n✅ Saved: {path}")
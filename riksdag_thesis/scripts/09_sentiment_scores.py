@@ -0,0 +1,135 @@
+"""
+Sentiment Scores for Speeches and Opponent Sentences
+Scores every speech and every opponent sentence (from 08) against a
+Swedish sentiment lexicon with sparse matrix products, not a Python loop
+per speech. Speeches are scored from the tokenized corpus store when it
+has been built (python scripts/token_store.py build), otherwise they are
+streamed and tokenized in batches.
+
+Outputs (keyed by speech_id, so they join back to the speeches dataset):
+    data/processed/speech_sentiment.parquet
+    data/processed/opponent_sentence_sentiment.parquet
+    output/tables/negativity_by_party_year.csv
+"""
+import argparse
+import os
+import pandas as pd
+from tqdm import tqdm
+from sentiment import TEST_LEXICON, load_lexicon, corpus_lexicon, score_matrix, score_texts
+from token_store import TokenizedCorpus, count_matrix, tokenize
+from speech_store import iter_speech_batches, read_speeches, read_table, ChunkedWriter
+
+SPEECH_SENTIMENT_FILE = 'data/processed/speech_sentiment.parquet'
+SENTENCE_SENTIMENT_FILE = 'data/processed/opponent_sentence_sentiment.parquet'
+OPPONENT_SENTENCES_FILE = 'data/processed/opponent_sentences.parquet'
+TABLES_DIR = 'output/tables'
+
+SCORE_COLUMNS = ['n_tokens', 'negative', 'positive', 'negativity', 'positivity', 'net_sentiment']
+
+def score_speeches(lexicon_path, corpus=None, output_file=SPEECH_SENTIMENT_FILE, batch_size=5000):
+    """Per-speech scores; returns the number of speeches scored and the output path"""
+    writer = ChunkedWriter(output_file, ['speech_id'] + SCORE_COLUMNS)
+
+    if corpus is not None:
+        scores = score_matrix(corpus.matrix, corpus_lexicon(corpus, lexicon_path))
+        scores.insert(0, 'speech_id', corpus.speech_ids)
+        writer.write(scores)
+        writer.close()
+        return writer.rows, writer.path
+
+    lexicon = load_lexicon(lexicon_path)
+    try:
+        for batch in tqdm(iter_speech_batches(['speech_id', 'text'], batch_size), desc="Speeches"):
+            scores = score_texts(batch['text'], lexicon)
+            scores.insert(0, 'speech_id', batch['speech_id'].to_numpy())
+            writer.write(scores)
+    finally:
+        writer.close()
+
+    return writer.rows, writer.path
+
+def score_opponent_sentences(lexicon_path, corpus=None, input_file=OPPONENT_SENTENCES_FILE,
+                             output_file=SENTENCE_SENTIMENT_FILE):
+    """Scores for the sentences extracted by 08, one row per (sentence, target party)"""
+    sentences = read_table(input_file, csv_path=os.path.splitext(input_file)[0] + '.csv')
+
+    if corpus is not None:
+        # Sentences come from the speeches, so every token is already in the vocabulary
+        matrix = count_matrix(tokenize(sentences['sentence']), corpus.index, grow=False)
+        scores = score_matrix(matrix, corpus_lexicon(corpus, lexicon_path))
+    else:
+        scores = score_texts(sentences['sentence'], load_lexicon(lexicon_path))
+
+    keys = sentences[['speech_id', 'party', 'target_party', 'sentence_start', 'sentence_end']].reset_index(drop=True)
+    result = pd.concat([keys, scores], axis=1)
+
+    writer = ChunkedWriter(output_file, list(result.columns))
+    writer.write(result)
+    writer.close()
+
+    return result, writer.path
+
+def negativity_by_party_year(speech_scores, sentence_scores=None):
+    """Token-weighted negativity per party and year, for whole speeches and opponent sentences"""
+    speeches = read_speeches(columns=['speech_id', 'party', 'year'])
+    df = speeches.merge(speech_scores, on='speech_id')
+
+    grouped = df.groupby(['party', 'year'], observed=True)[['negative', 'n_tokens']].sum()
+    table = pd.DataFrame({
+        'speeches': df.groupby(['party', 'year'], observed=True).size(),
+        'negativity': grouped['negative'] / grouped['n_tokens'].clip(lower=1),
+    })
+
+    if sentence_scores is not None and len(sentence_scores):
+        # Sentences mentioning several parties are counted once
+        sentences = sentence_scores.drop_duplicates(['speech_id', 'sentence_start'])
+        sentences = sentences.merge(speeches[['speech_id', 'year']], on='speech_id')
+        grouped = sentences.groupby(['party', 'year'], observed=True)[['negative', 'n_tokens']].sum()
+        table['opponent_sentence_negativity'] = grouped['negative'] / grouped['n_tokens'].clip(lower=1)
+
+    return table.reset_index()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lexicon-based sentiment scores")
+    parser.add_argument('--lexicon', default=TEST_LEXICON, help="CSV with word,polarity columns")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Speeches per batch")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("09. SENTIMENT SCORES")
+    print("=" * 70)
+
+    print(f"\n📖 Lexicon: {args.lexicon}")
+
+    corpus = TokenizedCorpus.load_current()
+    if corpus is not None:
+        print("🔤 Using tokenized corpus store")
+    else:
+        print("⚠️  No current tokenized corpus, hashing tokens instead (python scripts/token_store.py build)")
+
+    n_speeches, speech_path = score_speeches(args.lexicon, corpus, batch_size=args.batch_size)
+    print(f"\n📊 Speeches scored: {n_speeches:,}")
+    print(f"✅ Saved: {speech_path}")
+
+    sentence_scores = None
+    if os.path.exists(OPPONENT_SENTENCES_FILE):
+        sentence_scores, sentence_path = score_opponent_sentences(args.lexicon, corpus)
+        print(f"\n💬 Opponent sentences scored: {len(sentence_scores):,}")
+        print(f"✅ Saved: {sentence_path}")
+    else:
+        print(f"\n⚠️  {OPPONENT_SENTENCES_FILE} not found - run 08_opponent_sentences.py first")
+
+    speech_scores = read_table(speech_path, columns=['speech_id', 'negative', 'n_tokens'],
+                               csv_path=os.path.splitext(speech_path)[0] + '.csv')
+    table = negativity_by_party_year(speech_scores, sentence_scores)
+
+    os.makedirs(TABLES_DIR, exist_ok=True)
+    table_path = os.path.join(TABLES_DIR, 'negativity_by_party_year.csv')
+    table.to_csv(table_path, index=False)
+
+    print("\n📉 Negativity (per 1,000 tokens) by party:")
+    by_party = table.groupby('party')['negativity'].mean() * 1000
+    for party, value in by_party.sort_values(ascending=False).items():
+        print(f"   {party:5s} {value:.2f}")
+
+    print(f"\n✅ Saved: {table_path}")
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: per-speech text cleaning in 04_parse_speeches.py
+Cuts the raw speech slices out of the bundled transcripts once, then times
+the old re.sub chain against clean_speech_text on exactly the same input
+and checks that both give the same text.
+
+Usage:
+    python scripts/bench_text_cleaning.py [--files 50] [--repeat 5]
+"""
+import argparse
+import html
+import importlib
+import re
+import time
+from transcript_archive import read_transcript
+
+parser_module = importlib.import_module('04_parse_speeches')
+
+def clean_speech_text_regex(text):
+    """Cleaning as done before the compiled-pattern normalizer (plus soft-hyphen removal)"""
+    text = text.strip()
+    text = re.sub(r'\n+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'\s*\xad\s*', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def raw_speech_slices(filepaths):
+    """Uncleaned text of every speech, cut at the same positions as extract_speeches"""
+    slices = []
+
+    for filepath in filepaths:
+        html_match = parser_module.HTML_PAYLOAD_PATTERN.search(read_transcript(filepath))
+        if not html_match:
+            continue
+
+        full_text, matches, boundaries = parser_module.find_speakers_lxml(html.unescape(html_match.group(1)))
+        for _, start, end, _ in parser_module.speech_spans(full_text, matches, boundaries):
+            slices.append(full_text[start:end])
+
+    return slices
+
+def best_time(func, texts, repeat):
+    """Fastest of repeat runs over all texts, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-speech text cleaning")
+    parser.add_argument('--files', type=int, default=50, help="Number of transcripts to take speeches from")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    filepaths = parser_module.list_transcripts()[:args.files]
+    texts = raw_speech_slices(filepaths)
+    megabytes = sum(len(text) for text in texts) / 1024 ** 2
+
+    print(f"🧪 {len(texts):,} speeches ({megabytes:.1f} MB) from {len(filepaths)} transcripts\n")
+
+    mismatches = sum(clean_speech_text_regex(text) != parser_module.clean_speech_text(text) for text in texts)
+
+    results = {
+        're.sub chain': best_time(clean_speech_text_regex, texts, args.repeat),
+        'clean_speech_text': best_time(parser_module.clean_speech_text, texts, args.repeat),
+    }
+
+    for name, seconds in results.items():
+        print(f"   {name:18s} {seconds / len(texts) * 1e6:8.1f} µs/speech  {megabytes / seconds:7.1f} MB/s")
+
+    speedup = results['re.sub chain'] / results['clean_speech_text']
+    print(f"\n⚡ Speedup: {speedup:.1f}x")
+    print(f"{'✅' if mismatches == 0 else '❌'} Identical output: {len(texts) - mismatches:,}/{len(texts):,} speeches")
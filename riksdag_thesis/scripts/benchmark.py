@@ -0,0 +1,284 @@
+"""
+Benchmark the pipeline stages
+Runs each stage on a fixed fixture (the first N transcripts of
+data/raw/transcripts in sorted order, and the speeches parsed from them)
+and reports time, throughput (MB/s, speeches/s) and peak RSS. Every
+benchmark runs in its own fresh process so peak memory is per stage.
+
+Results are appended to output/benchmarks/results.jsonl together with the
+git commit, and each run is compared with the latest result from another
+commit so regressions show up.
+
+Usage:
+    python scripts/benchmark.py                      # all benchmarks
+    python scripts/benchmark.py --only parse_html opponent_matrix
+    python scripts/benchmark.py --files 50 --repeat 5
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+from instrumentation import peak_rss_mb
+
+RESULTS_FILE = 'output/benchmarks/results.jsonl'
+TRANSCRIPT_DIR = 'data/raw/transcripts'
+
+# Columns 05 and 07 load
+DESCRIPTIVES_COLUMNS = ['speaker', 'party', 'dok_id', 'datum', 'year', 'word_count']
+SUMMARY_COLUMNS = ['year', 'party', 'has_opponent_ref']
+
+# Slower than the previous commit by more than this is flagged
+REGRESSION_THRESHOLD = 0.10
+
+def parser_module():
+    return importlib.import_module('04_parse_speeches')
+
+def best_time(func, repeat):
+    """Fastest of repeat runs, in seconds, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+# Fixture setup (not timed)
+
+def make_fixture(files, fixture_dir):
+    """Copy the first `files` transcripts into fixture_dir and parse them once"""
+    m = parser_module()
+    transcript_dir = os.path.join(fixture_dir, 'transcripts')
+    os.makedirs(transcript_dir)
+
+    for filepath in m.list_transcripts(TRANSCRIPT_DIR)[:files]:
+        shutil.copy(filepath, transcript_dir)
+
+    speeches, _ = m.process_all_transcripts(transcript_dir, use_cache=False, archive_path=None)
+    speeches['year'] = pd.to_datetime(speeches['datum']).dt.year
+    speeches.insert(0, 'speech_id', range(len(speeches)))
+    speeches.to_pickle(os.path.join(fixture_dir, 'speeches.pkl'))
+
+    return transcript_dir
+
+def read_contents(transcript_dir):
+    m = parser_module()
+    contents = []
+    for filepath in m.list_transcripts(transcript_dir):
+        with open(filepath, encoding='utf-8') as f:
+            contents.append(f.read())
+    return contents
+
+def megabytes(texts):
+    return sum(len(text.encode('utf-8')) for text in texts) / 1024 ** 2
+
+# Benchmarks: each returns (timed function, MB processed, speeches processed or None)
+
+def bench_metadata(fixture_dir):
+    m = parser_module()
+    contents = read_contents(os.path.join(fixture_dir, 'transcripts'))
+    return lambda: [m.extract_metadata_from_xml(c) for c in contents], megabytes(contents), None
+
+def bench_parse_html(fixture_dir):
+    m = parser_module()
+    contents = read_contents(os.path.join(fixture_dir, 'transcripts'))
+    payloads = [match.group(1) for match in map(m.HTML_PAYLOAD_PATTERN.search, contents) if match]
+    n_speeches = len(pd.read_pickle(os.path.join(fixture_dir, 'speeches.pkl')))
+    return lambda: [m.parse_riksdag_html(p) for p in payloads], megabytes(payloads), n_speeches
+
+def bench_process_all(fixture_dir):
+    m = parser_module()
+    transcript_dir = os.path.join(fixture_dir, 'transcripts')
+    size = sum(os.path.getsize(p) for p in m.list_transcripts(transcript_dir)) / 1024 ** 2
+    n_speeches = len(pd.read_pickle(os.path.join(fixture_dir, 'speeches.pkl')))
+
+    def run():
+        # Progress output is silenced in the worker (see run_benchmark)
+        return m.process_all_transcripts(transcript_dir, use_cache=False, archive_path=None)
+
+    return run, size, n_speeches
+
+def bench_party_mentions(fixture_dir):
+    from party_mentions import detect_party_mentions
+    df = pd.read_pickle(os.path.join(fixture_dir, 'speeches.pkl'))
+    rows = list(zip(df['text'], df['party']))
+    return lambda: [detect_party_mentions(t, p) for t, p in rows], megabytes(df['text']), len(df)
+
+def bench_opponent_matrix(fixture_dir):
+    from party_mentions import opponent_mentions, opponent_matrix
+    df = pd.read_pickle(os.path.join(fixture_dir, 'speeches.pkl'))
+
+    def run():
+        mentions = opponent_mentions(df['text'], df['party'])
+        return opponent_matrix(mentions, df['party'])
+
+    return run, megabytes(df['text']), len(df)
+
+def load_fixture_tables(fixture_dir):
+    """Speeches and opponent tables of the fixture, written as CSV and Parquet once"""
+    from party_mentions import opponent_mentions
+    from speech_store import write_speeches, write_table
+
+    paths = {name: os.path.join(fixture_dir, name)
+             for name in ('speeches.csv', 'speeches_parquet', 'opponents.csv', 'opponents.parquet')}
+    if not os.path.exists(paths['opponents.parquet']):
+        df = pd.read_pickle(os.path.join(fixture_dir, 'speeches.pkl'))
+        df.to_csv(paths['speeches.csv'], index=False, encoding='utf-8')
+        write_speeches(df, paths['speeches_parquet'])
+
+        df['has_opponent_ref'] = opponent_mentions(df['text'], df['party']).getnnz(axis=1) > 0
+        df.to_csv(paths['opponents.csv'], index=False, encoding='utf-8')
+        write_table(df.drop(columns=['text']), paths['opponents.parquet'])
+
+    return paths
+
+def bench_load_csv(fixture_dir):
+    paths = load_fixture_tables(fixture_dir)
+    n_speeches = len(pd.read_pickle(os.path.join(fixture_dir, 'speeches.pkl')))
+    size = (os.path.getsize(paths['speeches.csv']) + os.path.getsize(paths['opponents.csv'])) / 1024 ** 2
+
+    def run():
+        # What 05 and 07 read without the Parquet files
+        return (pd.read_csv(paths['speeches.csv'], usecols=DESCRIPTIVES_COLUMNS),
+                pd.read_csv(paths['opponents.csv'], usecols=SUMMARY_COLUMNS))
+
+    return run, size, n_speeches
+
+def bench_load_parquet(fixture_dir):
+    from speech_store import read_speeches, read_table
+    paths = load_fixture_tables(fixture_dir)
+    n_speeches = len(pd.read_pickle(os.path.join(fixture_dir, 'speeches.pkl')))
+    dataset_size = sum(os.path.getsize(os.path.join(root, f))
+                       for root, _, files in os.walk(paths['speeches_parquet']) for f in files)
+    size = (dataset_size + os.path.getsize(paths['opponents.parquet'])) / 1024 ** 2
+
+    def run():
+        return (read_speeches(columns=DESCRIPTIVES_COLUMNS, path=paths['speeches_parquet']),
+                read_table(paths['opponents.parquet'], columns=SUMMARY_COLUMNS))
+
+    return run, size, n_speeches
+
+BENCHMARKS = {
+    'metadata': bench_metadata,
+    'parse_html': bench_parse_html,
+    'process_all': bench_process_all,
+    'party_mentions': bench_party_mentions,
+    'opponent_matrix': bench_opponent_matrix,
+    'load_csv': bench_load_csv,
+    'load_parquet': bench_load_parquet,
+}
+
+def run_benchmark(name, fixture_dir, repeat):
+    """Runs in a fresh worker process; stdout is silenced so only results are printed"""
+    sys.stdout = open(os.devnull, 'w')
+    sys.stderr = sys.stdout
+
+    func, size_mb, n_speeches = BENCHMARKS[name](fixture_dir)
+    rss_before = peak_rss_mb()
+    seconds, _ = best_time(func, repeat)
+
+    return {
+        'benchmark': name,
+        'seconds': seconds,
+        'mb_per_s': size_mb / seconds,
+        'speeches_per_s': n_speeches / seconds if n_speeches else None,
+        'size_mb': size_mb,
+        'speeches': n_speeches,
+        'peak_rss_mb': peak_rss_mb(),
+        'setup_rss_mb': rss_before,
+    }
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_results(path=RESULTS_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def previous_result(history, result):
+    """Latest stored result of the same benchmark and fixture from another commit"""
+    for old in reversed(history):
+        if (old['benchmark'] == result['benchmark'] and old['files'] == result['files']
+                and old['commit'] != result['commit']):
+            return old
+    return None
+
+def run_all(names, files, repeat, results_file=RESULTS_FILE):
+    history = load_results(results_file)
+    fixture_dir = tempfile.mkdtemp(prefix='riksdag_bench_')
+    run_info = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'files': files,
+        'repeat': repeat,
+    }
+
+    try:
+        print(f"🧰 Building fixture from the first {files} transcripts...")
+        make_fixture(files, fixture_dir)
+
+        results = []
+        for name in names:
+            # Fresh process per benchmark: clean imports and a per-benchmark peak RSS
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                result = {**run_info, **pool.submit(run_benchmark, name, fixture_dir, repeat).result()}
+            results.append(result)
+            print_result(result, previous_result(history, result))
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(results_file), exist_ok=True)
+    with open(results_file, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+
+    return results
+
+def print_result(result, previous=None):
+    line = (f"   {result['benchmark']:16s} {result['seconds']:8.3f}s  {result['mb_per_s']:8.1f} MB/s  ")
+    line += f"{result['speeches_per_s']:10,.0f} speeches/s  " if result['speeches_per_s'] else ' ' * 24
+    if result['peak_rss_mb'] is not None:
+        # Growth over the peak after setup is what the stage itself allocated
+        line += f"peak RSS {result['peak_rss_mb']:7.1f} MB (+{result['peak_rss_mb'] - result['setup_rss_mb']:.1f})"
+
+    if previous:
+        change = result['seconds'] / previous['seconds'] - 1
+        flag = '⚠️ ' if change > REGRESSION_THRESHOLD else ''
+        line += f"  {flag}{change:+.0%} vs {previous['commit']}"
+
+    print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--files', type=int, default=20, help="Transcripts in the fixture")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark (best is kept)")
+    parser.add_argument('--results', default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("PIPELINE BENCHMARKS")
+    print("=" * 70)
+
+    run_all(args.only, args.files, args.repeat, args.results)
+
+    print(f"\n✅ Saved: {args.results}")
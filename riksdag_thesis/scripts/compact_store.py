@@ -0,0 +1,207 @@
+"""
+Interned, integer-coded speech store.
+Speakers, parties and debates are kept once in small dimension tables with
+integer ids; every speech is a row of small int codes plus an offset into
+one UTF-8 text blob. A categorical DataFrame is rebuilt on demand straight
+from the codes, and the text is only read (through mmap) when asked for.
+
+Files in COMPACT_DIR:
+    speakers.csv    speaker_code, speaker (one row per header variant)
+    parties.csv     party_code, party
+    debates.csv     debate_id, dok_id and the per-document header fields
+    speeches.npz    speech_id, debate, speaker, party, speaker_id (resolved person,
+                    see speaker_resolution.py), speech_number (-1 if none),
+                    word_count, text_offsets (n + 1 byte offsets into text.bin)
+    text.bin        all speech texts, UTF-8, concatenated in speech order
+
+Usage:
+    python scripts/compact_store.py build     # from the speeches dataset
+    python scripts/compact_store.py info
+"""
+import argparse
+import mmap
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from speech_store import read_speeches
+
+COMPACT_DIR = 'data/processed/speeches_compact'
+STORE_FILES = ('speakers.csv', 'parties.csv', 'debates.csv', 'speeches.npz', 'text.bin')
+
+# Per-document columns, stored once per debate instead of once per speech
+DEBATE_COLUMNS = ['dok_id', 'datum', 'titel', 'rm', 'systemdatum', 'status', 'hangar_id', 'year']
+# (column, dimension table, id column) for every interned speech column
+DIMENSIONS = [('speaker', 'speakers', 'speaker_code'), ('party', 'parties', 'party_code')]
+
+def intern(values):
+    """(codes, sorted unique values) of a column; missing values get code -1"""
+    categorical = pd.Categorical(values)
+    return categorical.codes, np.asarray(categorical.categories, dtype=object)
+
+class CompactSpeechStore:
+    """Dimension tables + integer-coded speech arrays + text blob"""
+
+    def __init__(self, tables, arrays, directory=COMPACT_DIR):
+        self.tables = tables
+        self.arrays = arrays
+        self.directory = directory
+        self._text = None
+
+    @classmethod
+    def build(cls, speeches):
+        """Intern a speeches DataFrame (as written by 04)"""
+        speeches = speeches.sort_values('speech_id')
+        tables, arrays = {}, {'speech_id': speeches['speech_id'].to_numpy(dtype=np.int64)}
+
+        for column, table, id_column in DIMENSIONS:
+            codes, values = intern(speeches[column].astype(str))
+            arrays[column] = codes.astype(np.int32 if len(values) > 127 else np.int8)
+            tables[table] = pd.DataFrame({id_column: np.arange(len(values)), column: values})
+
+        debate_codes, dok_ids = intern(speeches['dok_id'].astype(str))
+        debates = (speeches.assign(dok_id=speeches['dok_id'].astype(str))
+                   .drop_duplicates('dok_id').set_index('dok_id')
+                   .loc[dok_ids, [c for c in DEBATE_COLUMNS[1:] if c in speeches.columns]])
+        tables['debates'] = debates.astype(str).reset_index().rename_axis('debate_id').reset_index()
+        arrays['debate'] = debate_codes.astype(np.int32)
+
+        arrays['speech_number'] = (pd.to_numeric(speeches['speech_number'], errors='coerce')
+                                   .fillna(-1).to_numpy(dtype=np.int32))
+        arrays['word_count'] = speeches['word_count'].to_numpy(dtype=np.int32)
+        if 'speaker_id' in speeches.columns:
+            arrays['speaker_id'] = speeches['speaker_id'].to_numpy(dtype=np.int64)
+
+        encoded = [text.encode('utf-8') for text in speeches['text'].fillna('')]
+        arrays['text_offsets'] = np.concatenate(([0], np.cumsum([len(b) for b in encoded]))).astype(np.int64)
+        store = cls(tables, arrays)
+        store._blob = b''.join(encoded)
+        return store
+
+    def save(self, directory=COMPACT_DIR):
+        """
+        Write every file into a fresh directory, then swap it in for the old
+        store: a crash leaves either the complete old store, the complete new
+        one, or no store (load_speeches then falls back to read_speeches),
+        never a speeches.npz next to a text.bin from another build.
+        """
+        directory = directory.rstrip(os.sep)
+        tmp_dir = f"{directory}.{os.getpid()}.tmp"
+        old_dir = f"{directory}.{os.getpid()}.old"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        for name, table in self.tables.items():
+            table.to_csv(os.path.join(tmp_dir, f"{name}.csv"), index=False, encoding='utf-8')
+        np.savez(os.path.join(tmp_dir, 'speeches.npz'), **self.arrays)
+        with open(os.path.join(tmp_dir, 'text.bin'), 'wb') as f:
+            f.write(self._blob)
+
+        if os.path.exists(directory):
+            os.rename(directory, old_dir)
+        os.rename(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        self.directory = directory
+
+    @classmethod
+    def load(cls, directory=COMPACT_DIR):
+        tables = {name: pd.read_csv(os.path.join(directory, f"{name}.csv"), dtype=str, keep_default_na=False)
+                  for name in ('speakers', 'parties', 'debates')}
+        with np.load(os.path.join(directory, 'speeches.npz')) as data:
+            arrays = {name: data[name] for name in data.files}
+
+        # The last text offset is the blob size the arrays were built with
+        text_size = os.path.getsize(os.path.join(directory, 'text.bin'))
+        if text_size != arrays['text_offsets'][-1]:
+            raise ValueError(f"{directory}: text.bin ({text_size:,} bytes) does not match speeches.npz "
+                             f"({arrays['text_offsets'][-1]:,} bytes); rebuild with compact_store.py build")
+        return cls(tables, arrays, directory)
+
+    @staticmethod
+    def exists(directory=COMPACT_DIR):
+        return all(os.path.exists(os.path.join(directory, name)) for name in STORE_FILES)
+
+    def __len__(self):
+        return len(self.arrays['speech_id'])
+
+    def categorical(self, codes, categories):
+        return pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=str))
+
+    def to_frame(self, columns=None):
+        """
+        Speeches as a DataFrame with categorical string columns built from the
+        codes (no per-row strings). The text is only loaded when 'text' is in columns.
+        """
+        df = pd.DataFrame({'speech_id': self.arrays['speech_id']})
+
+        for column, table, _ in DIMENSIONS:
+            df[column] = self.categorical(self.arrays[column], self.tables[table][column])
+
+        debates = self.tables['debates']
+        for column in DEBATE_COLUMNS:
+            if column not in debates.columns:
+                continue
+            if column == 'year':
+                df['year'] = debates['year'].astype(int).to_numpy()[self.arrays['debate']]
+            else:
+                # Debate-level categories: one code lookup per speech, no string copies
+                values = pd.Categorical(debates[column])
+                df[column] = self.categorical(values.codes[self.arrays['debate']], values.categories)
+
+        speech_number = pd.Series(self.arrays['speech_number'], dtype='Int32')
+        df['speech_number'] = speech_number.mask(speech_number < 0)
+        df['word_count'] = self.arrays['word_count']
+        if 'speaker_id' in self.arrays:
+            df['speaker_id'] = self.arrays['speaker_id']
+
+        if columns is None:
+            return df
+        if 'text' in columns:
+            df['text'] = list(self.iter_texts())
+        return df[columns]
+
+    def _text_view(self):
+        if self._text is None:
+            path = os.path.join(self.directory, 'text.bin')
+            with open(path, 'rb') as f:
+                # mmap cannot map an empty file (a corpus without speeches)
+                self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b''
+        return self._text
+
+    def text(self, row):
+        """Text of the speech in row (rows are in speech_id order)"""
+        offsets = self.arrays['text_offsets']
+        return str(self._text_view()[offsets[row]:offsets[row + 1]], 'utf-8')
+
+    def iter_texts(self, rows=None):
+        rows = range(len(self)) if rows is None else rows
+        return (self.text(row) for row in rows)
+
+def load_speeches(columns=None, directory=COMPACT_DIR):
+    """Speeches from the interned store when it has been built, otherwise from read_speeches()"""
+    if CompactSpeechStore.exists(directory):
+        return CompactSpeechStore.load(directory).to_frame(columns)
+    return read_speeches(columns=columns)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the interned speech store")
+    parser.add_argument('command', choices=['build', 'info'])
+    parser.add_argument('--dir', default=COMPACT_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print("🗜️  Interning speeches...")
+        start = time.time()
+        store = CompactSpeechStore.build(read_speeches())
+        store.save(args.dir)
+        print(f"✅ Saved: {args.dir} ({time.time() - start:.1f}s)")
+    else:
+        store = CompactSpeechStore.load(args.dir)
+
+    size = sum(os.path.getsize(os.path.join(args.dir, name)) for name in STORE_FILES)
+    print(f"📦 Interned speech store: {args.dir}")
+    print(f"   Speeches: {len(store):,}")
+    print(f"   Speakers: {len(store.tables['speakers']):,}, parties: {len(store.tables['parties'])}, "
+          f"debates: {len(store.tables['debates']):,}")
+    print(f"   Size: {size / 1024 ** 2:.1f} MB")
@@ -0,0 +1,118 @@
+"""
+Persistent download manifest for the transcript downloader.
+One JSON line per state change, keyed by dok_id - the last line wins.
+"""
+import json
+import os
+import hashlib
+import threading
+from datetime import datetime
+
+def write_atomic(path, data):
+    """Write bytes to path via a temp file + rename, so readers never see partial files"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+class DownloadManifest:
+    """Per-dok_id download state (state, bytes, sha256, http_status, attempts)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Half-written last line from a crash - ignore it
+                    continue
+                self.entries[entry['dok_id']] = entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, dok_id):
+        return self.entries.get(dok_id)
+
+    def is_done(self, dok_id):
+        entry = self.entries.get(dok_id)
+        return entry is not None and entry['state'] == 'done'
+
+    def attempts(self, dok_id):
+        entry = self.entries.get(dok_id)
+        return entry['attempts'] if entry else 0
+
+    def failed_ids(self):
+        return [dok_id for dok_id, e in self.entries.items() if e['state'] == 'failed']
+
+    def record(self, dok_id, state, size=None, sha256=None, http_status=None, attempts=0):
+        """Append one state change and flush it to disk immediately"""
+        entry = {
+            'dok_id': dok_id,
+            'state': state,
+            'bytes': size,
+            'sha256': sha256,
+            'http_status': http_status,
+            'attempts': attempts,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+        }
+
+        with self.lock:
+            self.entries[dok_id] = entry
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+        return entry
+
+    def compact(self):
+        """Rewrite the log with one line per dok_id (atomic)"""
+        with self.lock:
+            lines = ''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in self.entries.values())
+            write_atomic(self.path, lines.encode('utf-8'))
+
+    def adopt_existing(self, output_dir):
+        """One-time migration: register transcripts downloaded before the manifest existed"""
+        adopted = 0
+
+        for filename in os.listdir(output_dir):
+            if not filename.endswith('.txt') or filename == 'failed_downloads.txt':
+                continue
+
+            dok_id = filename[:-4]
+            if dok_id in self.entries:
+                continue
+
+            with open(os.path.join(output_dir, filename), 'rb') as f:
+                data = f.read()
+
+            self.entries[dok_id] = {
+                'dok_id': dok_id,
+                'state': 'done',
+                'bytes': len(data),
+                'sha256': sha256_bytes(data),
+                'http_status': None,
+                'attempts': 0,
+                'updated': datetime.now().isoformat(timespec='seconds'),
+            }
+            adopted += 1
+
+        if adopted:
+            self.compact()
+
+        return adopted
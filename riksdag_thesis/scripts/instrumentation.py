@@ -0,0 +1,227 @@
+"""
+Lightweight instrumentation for the pipeline scripts.
+Timers (context manager or decorator) and counters record into the active
+Recorder; when nothing is active they do nothing, so library code can be
+instrumented without passing a report around. A RunReport is a Recorder
+for a whole script run that also writes a JSON report to data/processed/,
+optionally with a cProfile summary and tracemalloc allocation sites.
+
+    report = RunReport('06_opponent_references').start()
+    with timer('load'):
+        ...
+    count('speeches', len(df))
+    report.finish()
+
+Profiling is switched on per run with the RIKSDAG_PROFILE environment
+variable (comma separated: cpu, memory), e.g. RIKSDAG_PROFILE=cpu,memory.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_DIR = 'data/processed'
+PROFILE_ENV = 'RIKSDAG_PROFILE'
+
+_active = None
+
+class Recorder:
+    """Accumulated timers ({name: [seconds, calls]}) and counters ({name: n})"""
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        # Download threads (03) record into the same recorder
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                entry = self.timers.setdefault(name, [0.0, 0])
+                entry[0] += elapsed
+                entry[1] += 1
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """Picklable copy, e.g. to send from a worker process back to the parent"""
+        return {'timers': {k: list(v) for k, v in self.timers.items()}, 'counters': dict(self.counters)}
+
+    def merge(self, snapshot):
+        with self.lock:
+            for name, (seconds, calls) in snapshot['timers'].items():
+                entry = self.timers.setdefault(name, [0.0, 0])
+                entry[0] += seconds
+                entry[1] += calls
+        for name, n in snapshot['counters'].items():
+            self.count(name, n)
+
+@contextmanager
+def recording(recorder):
+    """Make recorder the active one inside the block (None leaves things unchanged)"""
+    global _active
+    if recorder is None:
+        yield None
+        return
+
+    previous, _active = _active, recorder
+    try:
+        yield recorder
+    finally:
+        _active = previous
+
+def is_recording():
+    return _active is not None
+
+def timer(name):
+    """Time a block into the active recorder"""
+    return _active.timer(name) if _active is not None else nullcontext()
+
+def timed(name=None):
+    """Decorator version of timer(); the name defaults to the function name"""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+def merge_snapshot(snapshot):
+    """Add a Recorder.snapshot() (e.g. from a worker process) to the active recorder"""
+    if _active is not None:
+        _active.merge(snapshot)
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+class RunReport(Recorder):
+    """Recorder for one script run, written to <report_dir>/run_report_<stage>.json"""
+
+    def __init__(self, stage, report_dir=REPORT_DIR, profile=None):
+        super().__init__()
+        self.stage = stage
+        self.report_dir = report_dir
+        self.info = {}
+
+        if profile is None:
+            profile = [p.strip() for p in os.environ.get(PROFILE_ENV, '').split(',') if p.strip()]
+        self.profile_cpu = 'cpu' in profile
+        self.profile_memory = 'memory' in profile
+        self.profiler = None
+
+    @property
+    def path(self):
+        return os.path.join(self.report_dir, f"run_report_{self.stage}.json")
+
+    def set(self, key, value):
+        """Free-form run information (settings, engine, ...)"""
+        self.info[key] = value
+
+    def start(self):
+        global _active
+        _active = self
+
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+        if self.profile_memory:
+            tracemalloc.start()
+        if self.profile_cpu:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def cpu_profile(self, limit=30):
+        """Top functions by cumulative time"""
+        self.profiler.disable()
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+
+        for (filename, line, func), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({'function': f"{os.path.basename(filename)}:{line}({func})",
+                         'calls': calls, 'own_seconds': own, 'cumulative_seconds': cumulative})
+
+        # Full profile for snakeviz / pstats next to the report
+        self.profiler.dump_stats(os.path.join(self.report_dir, f"run_report_{self.stage}.prof"))
+        return sorted(rows, key=lambda r: r['cumulative_seconds'], reverse=True)[:limit]
+
+    def memory_profile(self, limit=15):
+        """Peak traced memory and the allocation sites holding the most memory at the end"""
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        top = snapshot.statistics('lineno')[:limit]
+        return {
+            'peak_traced_mb': peak / 1024 ** 2,
+            'top_allocations': [{'site': str(stat.traceback[0]), 'mb': stat.size / 1024 ** 2,
+                                 'blocks': stat.count} for stat in top],
+        }
+
+    def finish(self):
+        """Stop recording and write the report; returns its path"""
+        global _active
+        if _active is self:
+            _active = None
+
+        os.makedirs(self.report_dir, exist_ok=True)
+        report = {
+            'stage': self.stage,
+            'argv': sys.argv[1:],
+            'started_at': self.started_at,
+            'wall_seconds': time.perf_counter() - self.wall_start,
+            'cpu_seconds': time.process_time() - self.cpu_start,
+            'peak_rss_mb': peak_rss_mb(),
+            'info': self.info,
+            'timers': {name: {'seconds': seconds, 'calls': calls}
+                       for name, (seconds, calls) in sorted(self.timers.items(), key=lambda t: -t[1][0])},
+            'counters': self.counters,
+        }
+
+        if resource is not None:
+            # Worker processes (04 --workers) are not in process_time()
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            report['child_cpu_seconds'] = children.ru_utime + children.ru_stime
+
+        if self.profiler is not None:
+            report['cpu_profile'] = self.cpu_profile()
+        if self.profile_memory:
+            report['memory_profile'] = self.memory_profile()
+
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        print(f"🧾 Run report: {self.path}")
+        return self.path
@@ -0,0 +1,122 @@
+"""
+On-disk cache of parse results (speeches and file features), one pickle per transcript.
+Entries are keyed by the transcript's SHA-256 plus the parser version and
+engine, so a changed file or a changed parser simply misses the cache.
+
+Usage:
+    python scripts/parse_cache.py info
+    python scripts/parse_cache.py purge                 # remove everything
+    python scripts/parse_cache.py purge --max-mb 500    # evict least recently used down to 500 MB
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import time
+
+CACHE_DIR = 'data/cache/parsed_speeches'
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+class ParseCache:
+    """Directory of <hash>-<parser version>.pkl files with LRU eviction by total size"""
+
+    def __init__(self, cache_dir=CACHE_DIR, parser_version='0', max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.parser_version = parser_version
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}-{self.parser_version}.pkl")
+
+    def get(self, digest):
+        """Cached parse result for this content hash, or None"""
+        path = self.path_for(digest)
+
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # Touch the entry so eviction keeps recently used files
+        os.utime(path)
+        return result
+
+    def put(self, digest, result):
+        path = self.path_for(digest)
+        # Unique temp name: several worker processes may write at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        """(path, size, last_used) for every cache entry, oldest first"""
+        entries = []
+
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime))
+
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+
+        for path, size, _ in entries:
+            if total <= max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+
+        return removed, total
+
+    def info(self):
+        entries = self.entries()
+        versions = {}
+        for path, size, _ in entries:
+            version = os.path.basename(path)[:-4].split('-', 1)[1]
+            versions[version] = versions.get(version, 0) + 1
+
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'versions': versions,
+            'oldest': time.ctime(entries[0][2]) if entries else None,
+            'newest': time.ctime(entries[-1][2]) if entries else None,
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or purge the parsed-speech cache")
+    parser.add_argument('command', choices=['info', 'purge'])
+    parser.add_argument('--dir', default=CACHE_DIR)
+    parser.add_argument('--max-mb', type=float, default=0,
+                        help="With purge: evict down to this size instead of removing everything")
+    args = parser.parse_args()
+
+    cache = ParseCache(args.dir)
+
+    if args.command == 'info':
+        info = cache.info()
+        print(f"📦 Cache: {args.dir}")
+        print(f"   Entries: {info['entries']:,}")
+        print(f"   Size: {info['bytes'] / 1024 ** 2:.1f} MB")
+        for version, count in sorted(info['versions'].items()):
+            print(f"   Parser version {version}: {count:,} entries")
+        if info['entries']:
+            print(f"   Last used: {info['oldest']} ... {info['newest']}")
+    else:
+        removed, remaining = cache.evict(int(args.max_mb * 1024 ** 2))
+        print(f"🧹 Removed {removed:,} entries, {remaining / 1024 ** 2:.1f} MB left")
@@ -0,0 +1,246 @@
+"""
+Party and bloc mention detection.
+Keywords are compiled into one trie-shaped regex that only matches whole
+words (plus Swedish inflection endings), so 'sd' no longer matches inside
+any word, 'mp' inside 'exempel' or 'liberal' inside 'nyliberal'. The hits
+go straight into a sparse speeches x targets count matrix.
+"""
+import re
+import bisect
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Party keywords in Swedish
+PARTY_KEYWORDS = {
+    'S': ['socialdemokrat', 'socialdemokraterna', 'sossarna', 's-parti'],
+    'M': ['moderat', 'moderaterna', 'm-parti'],
+    'SD': ['sverigedemokrat', 'sverigedemokraterna', 'sd-parti', 'sd'],
+    'V': ['vänsterparti', 'vänsterpartiet', 'vänstern', 'v-parti'],
+    'C': ['centerparti', 'centerpartiet', 'centern', 'c-parti'],
+    'L': ['liberal', 'liberalerna', 'l-parti'],
+    'MP': ['miljöparti', 'miljöpartiet', 'gröna', 'de gröna', 'mp'],
+    'KD': ['kristdemokrat', 'kristdemokraterna', 'kd-parti', 'kd']
+}
+
+# Bloc keywords
+BLOC_KEYWORDS = {
+    'left_bloc': ['vänsterblocket', 'rödgröna'],
+    'right_bloc': ['högerblocket', 'alliansen', 'borgerliga'],
+    'government': ['regeringen', 'regeringspartierna'],
+    'opposition': ['oppositionen']
+}
+
+PARTIES = list(PARTY_KEYWORDS)
+BLOCS = list(BLOC_KEYWORDS)
+TARGETS = PARTIES + BLOCS
+
+KEYWORD_TARGET = {kw: TARGETS.index(target)
+                  for target, keywords in {**PARTY_KEYWORDS, **BLOC_KEYWORDS}.items()
+                  for kw in keywords}
+
+# Endings allowed after a keyword: plural/definite forms, genitive,
+# adjective forms and the abbreviation genitive ("SD:s")
+SWEDISH_SUFFIXES = ['ernas', 'erna', 'ers', 'er', 'ens', 'en', 'ets', 'et', 'nas', 'na',
+                    'iska', 'iskt', 'isk', 'a', 'e', 't', 's', ':s']
+
+def trie_regex(words):
+    """
+    Regex alternation shaped like a prefix trie, e.g. ['sd', 'sd-parti'] -> 'sd(?:\\-parti)?'.
+    The engine then tests each character once per position instead of once per word.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Optional (greedy) when a keyword may also end here
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+# One pass over the text finds every keyword; group 1 is the keyword itself
+MENTION_PATTERN = re.compile(
+    r'\b(' + trie_regex(KEYWORD_TARGET) + r')(?:' + '|'.join(map(re.escape, SWEDISH_SUFFIXES)) + r')?\b'
+)
+
+# A keyword that contains another keyword of the same target never adds a hit
+# ('moderaterna' always contains 'moderat'), so only the minimal ones are counted
+MINIMAL_KEYWORDS = {
+    target: [kw for kw in keywords if not any(other != kw and other in kw for other in keywords)]
+    for target, keywords in {**PARTY_KEYWORDS, **BLOC_KEYWORDS}.items()
+}
+
+def find_mentions(text):
+    """All party/bloc mentions in text as (start, end, target, keyword), in text order"""
+    return [(m.start(), m.end(), TARGETS[KEYWORD_TARGET[m.group(1)]], m.group(1))
+            for m in MENTION_PATTERN.finditer(text.lower())]
+
+def detect_party_mentions(text, speaker_party):
+    """
+    Detect which parties are mentioned in the text
+    Returns list of mentioned parties (excluding speaker's own party)
+    """
+    mentioned = {target for _, _, target, _ in find_mentions(text)}
+
+    # Don't count mentions of own party
+    return [party for party in PARTIES if party in mentioned and party != speaker_party]
+
+def detect_party_mentions_substring(text, speaker_party):
+    """Old substring check (`keyword in text`), kept to reproduce earlier results"""
+    text_lower = text.lower()
+    mentioned_parties = []
+
+    for party, keywords in PARTY_KEYWORDS.items():
+        if party == speaker_party:
+            continue  # Don't count mentions of own party
+
+        for keyword in keywords:
+            if keyword in text_lower:
+                mentioned_parties.append(party)
+                break  # Found this party, move to next
+
+    return list(set(mentioned_parties))  # Remove duplicates
+
+def has_opponent_reference(text, speaker_party):
+    """Check if speech mentions any opponent"""
+    mentions = detect_party_mentions(text, speaker_party)
+    return len(mentions) > 0
+
+def mention_counts(texts, word_boundaries=True):
+    """Sparse (n_texts x len(TARGETS)) matrix of keyword hits per party/bloc"""
+    lowered = pd.Series(texts).fillna('').str.lower()
+
+    if word_boundaries:
+        hits = lowered.str.findall(MENTION_PATTERN)
+        lengths = hits.str.len().to_numpy()
+        rows = np.repeat(np.arange(len(hits)), lengths)
+        cols = np.fromiter((KEYWORD_TARGET[kw] for kws in hits for kw in kws),
+                           dtype=np.int32, count=lengths.sum())
+
+        # Duplicate (row, col) pairs are summed into counts
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                 shape=(len(hits), len(TARGETS)))
+
+    # Legacy substring counting
+    lowered = lowered.tolist()
+    n = len(lowered)
+    rows, cols, data = [], [], []
+
+    for col, target in enumerate(TARGETS):
+        counts = np.zeros(n, dtype=np.int32)
+        for keyword in MINIMAL_KEYWORDS[target]:
+            counts += np.fromiter((text.count(keyword) for text in lowered), dtype=np.int32, count=n)
+
+        hit_rows = np.flatnonzero(counts)
+        rows.append(hit_rows)
+        cols.append(np.full(len(hit_rows), col, dtype=np.int32))
+        data.append(counts[hit_rows])
+
+    return sparse.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(n, len(TARGETS)))
+
+def vocabulary_mention_groups(vocabulary):
+    """Per target, {token: hits} for every vocabulary token that contains a mention"""
+    groups = [{} for _ in TARGETS]
+
+    for token in vocabulary:
+        for keyword in MENTION_PATTERN.findall(token):
+            group = groups[KEYWORD_TARGET[keyword]]
+            group[token] = group.get(token, 0) + 1
+
+    return groups
+
+def corpus_mention_counts(corpus):
+    """
+    mention_counts for a TokenizedCorpus (token_store.py): only the vocabulary
+    is matched against the keywords, the counts come from one sparse product.
+    """
+    return corpus.group_counts(vocabulary_mention_groups(corpus.vocabulary))
+
+def opponent_mentions(texts, speaker_parties, word_boundaries=True, counts=None):
+    """
+    Boolean (n_texts x len(PARTIES)) sparse matrix: which other parties each
+    speech mentions. Same result as detect_party_mentions on every row
+    (or detect_party_mentions_substring with word_boundaries=False).
+    Pass counts (e.g. from corpus_mention_counts) to skip scanning texts.
+    """
+    if counts is None:
+        counts = mention_counts(texts, word_boundaries)
+    counts = counts.tocsr()[:, :len(PARTIES)].tocoo()
+
+    # Drop mentions of the speaker's own party
+    party_idx = pd.Series(speaker_parties).map({p: i for i, p in enumerate(PARTIES)}).to_numpy()
+    keep = party_idx[counts.row] != counts.col
+
+    return sparse.csr_matrix((np.ones(keep.sum(), dtype=bool), (counts.row[keep], counts.col[keep])),
+                             shape=counts.shape)
+
+def mentioned_party_labels(mentions):
+    """Comma-joined party codes per row of an opponent_mentions matrix"""
+    mentions = mentions.tocsr().sorted_indices()
+    labels = np.array(PARTIES)
+    return [','.join(labels[mentions.indices[start:end]])
+            for start, end in zip(mentions.indptr[:-1], mentions.indptr[1:])]
+
+def opponent_matrix(mentions, speaker_parties):
+    """Speaker party x mentioned party counts, as a DataFrame"""
+    party_idx = pd.Series(speaker_parties).map({p: i for i, p in enumerate(PARTIES)})
+    known = party_idx.notna().to_numpy()
+
+    # One-hot speaker parties, then a single sparse product
+    speakers = sparse.csr_matrix(
+        (np.ones(known.sum(), dtype=np.int64), (party_idx[known].astype(int).to_numpy(), np.flatnonzero(known))),
+        shape=(len(PARTIES), len(party_idx))
+    )
+    matrix = (speakers @ mentions.astype(np.int64)).toarray()
+
+    return pd.DataFrame(matrix, index=PARTIES, columns=PARTIES)
+
+# Sentence ends: . ! or ? followed by whitespace and an upper-case letter or digit,
+# so abbreviations like "t.ex. att" do not split a sentence
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-ZÅÄÖ0-9"”])')
+
+def split_sentences(text):
+    """(start, end) character offsets of each sentence in text"""
+    spans = []
+    start = 0
+
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        spans.append((start, boundary.start()))
+        start = boundary.end()
+
+    if start < len(text):
+        spans.append((start, len(text)))
+
+    return spans
+
+def opponent_sentences(text, speaker_party):
+    """
+    Sentences that mention another party, as (sentence_start, sentence_end, target_party).
+    The speech is scanned for mentions once; mentions are then assigned to sentences.
+    """
+    mentions = [(start, target) for start, _, target, _ in find_mentions(text)
+                if target in PARTY_KEYWORDS and target != speaker_party]
+    if not mentions:
+        return []
+
+    spans = split_sentences(text)
+    sentence_starts = [start for start, _ in spans]
+    found = []
+    seen = set()
+
+    for position, target in mentions:
+        i = bisect.bisect_right(sentence_starts, position) - 1
+        if (i, target) not in seen:
+            seen.add((i, target))
+            found.append((spans[i][0], spans[i][1], target))
+
+    return found
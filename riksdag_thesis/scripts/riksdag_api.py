@@ -0,0 +1,66 @@
+"""
+Shared helpers for the Riksdag dokumentlista API.
+The API returns results in pages (@sida/@sidor/@nasta_sida), so anything
+that only reads data['dokumentlista']['dokument'] sees the first page only.
+"""
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import timer, count
+
+BASE_URL = "https://data.riksdagen.se/dokumentlista/"
+PAGE_SIZE = 500
+
+def get_page(params, page=1, session=None, base_url=BASE_URL):
+    """Fetch one page of dokumentlista; returns the 'dokumentlista' dict"""
+    http = session if session is not None else requests
+
+    with timer('api_request'):
+        response = http.get(base_url, params={**params, 'utformat': 'json', 'p': page}, timeout=30)
+    response.raise_for_status()
+    count('api_pages')
+    count('api_bytes', len(response.content))
+
+    return response.json().get('dokumentlista', {})
+
+def page_documents(page):
+    """Documents on a page - the API returns a dict instead of a list for single hits"""
+    docs = page.get('dokument') or []
+    return [docs] if isinstance(docs, dict) else docs
+
+def count_documents(params, session=None, base_url=BASE_URL):
+    """Total number of hits, read from @traffar with a one-document page"""
+    page = get_page({**params, 'sz': 1}, session=session, base_url=base_url)
+    return int(page.get('@traffar', 0))
+
+def iter_dokumentlista(params, page_size=PAGE_SIZE, workers=4, session=None, base_url=BASE_URL):
+    """
+    Yield every document matching params, one by one, across all pages.
+
+    With workers > 1 the remaining pages are fetched in parallel once the
+    first page tells us how many there are (pages are still yielded in
+    order). With workers=1 pages are fetched lazily, so a caller that stops
+    early never requests pages it does not need.
+    """
+    params = {**params, 'sz': page_size}
+    session = session if session is not None else requests.Session()
+
+    first = get_page(params, 1, session, base_url)
+    yield from page_documents(first)
+
+    total_pages = int(first.get('@sidor', 1) or 1)
+    if total_pages <= 1:
+        return
+
+    if workers <= 1:
+        for page_no in range(2, total_pages + 1):
+            page = get_page(params, page_no, session, base_url)
+            docs = page_documents(page)
+            if not docs:
+                return
+            yield from docs
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pages = pool.map(lambda n: get_page(params, n, session, base_url), range(2, total_pages + 1))
+        for page in pages:
+            yield from page_documents(page)
@@ -0,0 +1,302 @@
+"""
+Run the pipeline
+Every stage declares the files it reads and writes. A stage runs only if
+one of its outputs is missing or older than its inputs (which include the
+stage's own script and helper modules), if its last run failed, or if a
+stage it depends on runs.
+Independent stages run in parallel, and no stage ever prompts.
+
+The download stages (02, 03) need network access and only run with
+--download; otherwise their outputs are treated as given. Packing the
+transcripts into the mmap archive is opt-in (--archive or naming the
+stage): 04 reads the archive when it exists and is current, and the loose
+files otherwise, so parse only depends on the transcripts.
+
+Usage:
+    python scripts/run_pipeline.py                 # bring everything up to date
+    python scripts/run_pipeline.py summary         # only what 07 needs
+    python scripts/run_pipeline.py --dry-run       # show what would run
+    python scripts/run_pipeline.py opponents --force
+    python scripts/run_pipeline.py --download --jobs 4
+    python scripts/run_pipeline.py --archive       # also (re)pack the transcript archive
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+SCRIPTS_DIR = 'scripts'
+LOG_DIR = 'output/logs'
+
+TRANSCRIPTS = 'data/raw/transcripts'
+METADATA = ['data/raw/riksdag_debates_metadata.csv', 'data/raw/riksdag_debates_metadata.json']
+ARCHIVE = ['data/raw/transcripts.pack', 'data/raw/transcripts.pack.index.json']
+SPEECHES = 'data/processed/speeches_parquet'
+COMPACT = 'data/processed/speeches_compact'
+TOKENS = 'data/processed/tokens'
+OPPONENT_REFS = 'data/processed/opponent_refs.parquet'
+OPPONENT_MATRIX = 'output/tables/opponent_matrix.csv'
+OPPONENT_SENTENCES = 'data/processed/opponent_sentences.parquet'
+LEXICON = 'data/lexicon/test_sentiment_lexicon.csv'
+
+# name -> script, arguments, inputs, outputs, helper modules the script imports.
+# Stages whose only product is printed output (07) get their log file as output.
+# Optional stages only run when named or enabled with their flag; 'after' only
+# orders stages that run together, without making one an input of the other.
+STAGES = {
+    'metadata': {
+        'script': '02_download_metadata.py', 'args': ['--incremental'], 'network': True,
+        'inputs': [], 'outputs': METADATA,
+        'modules': ['riksdag_api.py', 'instrumentation.py'],
+    },
+    'transcripts': {
+        'script': '03_download_transcripts.py', 'args': ['--yes'], 'network': True,
+        'inputs': METADATA[:1], 'outputs': [TRANSCRIPTS],
+        'modules': ['download_manifest.py', 'instrumentation.py'],
+    },
+    'archive': {
+        'script': 'transcript_archive.py', 'args': ['pack'], 'optional': True,
+        'inputs': [TRANSCRIPTS], 'outputs': ARCHIVE,
+        'modules': [],
+    },
+    'parse': {
+        'script': '04_parse_speeches.py', 'args': ['--yes', '--no-csv'], 'after': ['archive'],
+        'inputs': [TRANSCRIPTS],
+        'outputs': [SPEECHES, COMPACT, 'data/processed/file_stats.csv', 'data/processed/speech_index.npz',
+                    'data/processed/speakers.csv'],
+        'modules': ['parse_cache.py', 'speech_store.py', 'speech_index.py', 'compact_store.py',
+                    'speaker_resolution.py', 'transcript_archive.py', 'instrumentation.py'],
+    },
+    'tokens': {
+        'script': 'token_store.py', 'args': ['build'],
+        'inputs': [SPEECHES], 'outputs': [TOKENS],
+        'modules': ['speech_store.py'],
+    },
+    'descriptives': {
+        'script': '05_descriptives_for_supervisors.py', 'args': [],
+        'inputs': [COMPACT], 'outputs': ['output/figures/descriptive_statistics.png'],
+        'modules': ['compact_store.py', 'speech_store.py', 'instrumentation.py'],
+    },
+    'opponents': {
+        'script': '06_opponent_references.py', 'args': [],
+        'inputs': [SPEECHES, TOKENS],
+        'outputs': [OPPONENT_REFS, OPPONENT_MATRIX, 'output/figures/opponent_references.png'],
+        'modules': ['party_mentions.py', 'speech_store.py', 'token_store.py', 'instrumentation.py'],
+    },
+    'summary': {
+        'script': '07_presentation_summary.py', 'args': [],
+        'inputs': [OPPONENT_REFS, OPPONENT_MATRIX], 'outputs': [f'{LOG_DIR}/summary.log'],
+        'modules': ['speech_store.py', 'instrumentation.py'],
+    },
+    'sentences': {
+        'script': '08_opponent_sentences.py', 'args': [],
+        'inputs': [SPEECHES], 'outputs': [OPPONENT_SENTENCES],
+        'modules': ['party_mentions.py', 'speech_store.py'],
+    },
+    'sentiment': {
+        'script': '09_sentiment_scores.py', 'args': [],
+        'inputs': [SPEECHES, TOKENS, OPPONENT_SENTENCES, LEXICON],
+        'outputs': ['data/processed/speech_sentiment.parquet',
+                    'data/processed/opponent_sentence_sentiment.parquet',
+                    'output/tables/negativity_by_party_year.csv'],
+        'modules': ['sentiment.py', 'speech_store.py', 'token_store.py'],
+    },
+}
+
+def newest_mtime(path):
+    """Modification time of a file, or of the newest file inside a directory (None if missing)"""
+    if not os.path.exists(path):
+        return None
+    if not os.path.isdir(path):
+        return os.path.getmtime(path)
+
+    times = [os.path.getmtime(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files]
+    return max(times, default=os.path.getmtime(path))
+
+def stage_inputs(name):
+    stage = STAGES[name]
+    code = [os.path.join(SCRIPTS_DIR, f) for f in [stage['script']] + stage['modules']]
+    return stage['inputs'] + code
+
+def dependencies(name):
+    """Stages that produce one of this stage's inputs"""
+    producers = {path: other for other, stage in STAGES.items() for path in stage['outputs']}
+    return sorted({producers[path] for path in STAGES[name]['inputs'] if path in producers})
+
+def with_upstream(targets):
+    """The targets plus every stage they (transitively) depend on"""
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(dependencies(name))
+    return selected
+
+def failed_log_path(name):
+    return os.path.join(LOG_DIR, f"{name}.failed.log")
+
+def out_of_date(name):
+    """Reason the stage has to run, or None if its outputs are newer than all inputs"""
+    # Outputs left behind by a failed run are never up to date
+    if os.path.exists(failed_log_path(name)):
+        return 'failed last run'
+
+    output_times = [newest_mtime(path) for path in STAGES[name]['outputs']]
+    if any(t is None for t in output_times):
+        return 'missing output'
+
+    input_times = [(path, newest_mtime(path)) for path in stage_inputs(name)]
+    missing = [path for path, t in input_times if t is None]
+    if missing:
+        return f"missing input {missing[0]}"
+
+    newest_path, newest = max(input_times, key=lambda item: item[1])
+    if newest > min(output_times):
+        return f"{newest_path} changed"
+    return None
+
+def plan(targets, force=False, download=False):
+    """(stage, reason) for every stage that has to run, in dependency order"""
+    selected = with_upstream(targets)
+    if not download:
+        selected = {name for name in selected if not STAGES[name].get('network')}
+
+    to_run = {}
+    for name in topological_order(selected):
+        reason = 'forced' if force and name in targets else out_of_date(name)
+        upstream = [dep for dep in dependencies(name) if dep in to_run]
+        if reason is None and upstream:
+            reason = f"{upstream[0]} runs"
+        if reason:
+            to_run[name] = reason
+
+    return list(to_run.items())
+
+def topological_order(names):
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in order or name not in names:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle at stage '{name}'")
+        visiting.add(name)
+        for dep in dependencies(name):
+            visit(dep)
+        order.append(name)
+
+    # Definition order breaks ties, so the plan reads like the numbered scripts
+    for name in STAGES:
+        visit(name)
+    return order
+
+def run_stage(name):
+    """
+    Run one stage with its output going to output/logs/<stage>.log; returns (exit code, seconds).
+    A failed run's log is kept as <stage>.failed.log instead, which marks the stage out of date.
+    """
+    stage = STAGES[name]
+    for path in stage['outputs']:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    log_path = os.path.join(LOG_DIR, f"{name}.log")
+    tmp_log = log_path + '.tmp'
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, stage['script'])] + stage['args']
+    start = time.time()
+
+    with open(tmp_log, 'w', encoding='utf-8') as log:
+        # stdin closed: a stage that still tries to prompt fails instead of hanging
+        result = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                env={**os.environ, 'PYTHONUNBUFFERED': '1', 'PYTHONIOENCODING': 'utf-8'})
+
+    # The log only replaces the previous one once the stage has succeeded (it is 07's output)
+    if result.returncode == 0:
+        os.replace(tmp_log, log_path)
+        if os.path.exists(failed_log_path(name)):
+            os.remove(failed_log_path(name))
+    else:
+        os.replace(tmp_log, failed_log_path(name))
+    return result.returncode, time.time() - start
+
+def run_pipeline(steps, jobs=2):
+    """Run the planned stages, each as soon as the stages it depends on have finished"""
+    pending = dict(steps)
+    running = {}
+    done, failed = set(), set()
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in list(pending):
+                unfinished = set(pending) | set(running.values())
+                failed_deps = [dep for dep in dependencies(name) if dep in failed]
+                waiting = [dep for dep in dependencies(name) + STAGES[name].get('after', []) if dep in unfinished]
+                if failed_deps:
+                    print(f"⏭️  {name}: skipped ({', '.join(failed_deps)} failed)")
+                    failed.add(name)
+                    del pending[name]
+                elif not waiting and len(running) < jobs:
+                    print(f"▶️  {name}: {STAGES[name]['script']} ({pending.pop(name)})")
+                    running[pool.submit(run_stage, name)] = name
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                code, seconds = future.result()
+                if code == 0:
+                    done.add(name)
+                    print(f"✅ {name}: {seconds:.1f}s")
+                else:
+                    failed.add(name)
+                    print(f"❌ {name}: exit code {code} after {seconds:.1f}s, see {failed_log_path(name)}")
+
+    return done, failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline stages that are out of date")
+    parser.add_argument('targets', nargs='*', metavar='stage',
+                        help=f"Stages to bring up to date (default: all): {', '.join(STAGES)}")
+    parser.add_argument('--jobs', type=int, default=2, help="Stages to run at the same time")
+    parser.add_argument('--force', action='store_true', help="Run the target stages even if up to date")
+    parser.add_argument('--download', action='store_true', help="Include the network stages (02, 03)")
+    parser.add_argument('--archive', action='store_true', help="Include packing the transcript archive")
+    parser.add_argument('--dry-run', action='store_true', help="Only show what would run")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.targets if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    targets = args.targets or [name for name in STAGES if args.archive or not STAGES[name].get('optional')]
+    steps = plan(targets, args.force, args.download)
+
+    print("=" * 70)
+    print("RIKSDAG PIPELINE")
+    print("=" * 70)
+
+    if not steps:
+        print("\n✅ Everything is up to date")
+        raise SystemExit(0)
+
+    print(f"\n📋 {len(steps)} stage(s) to run:")
+    for name, reason in steps:
+        print(f"   {name:13s} {STAGES[name]['script']:36s} ({reason})")
+
+    if args.dry_run:
+        raise SystemExit(0)
+
+    print()
+    start = time.time()
+    done, failed = run_pipeline(steps, args.jobs)
+
+    print(f"\n{'❌' if failed else '🎉'} {len(done)} done, {len(failed)} failed in {time.time() - start:.1f}s")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,108 @@
+"""
+Dictionary-based sentiment scoring.
+A lexicon becomes two weight vectors (negative, positive) over token ids,
+so scoring a corpus is a couple of sparse matrix-vector products.
+
+The speeches are scored against the vocabulary of the tokenized corpus
+store (token_store.py). Other texts, e.g. single sentences, are tokenized
+on the fly and hashed into a fixed-size vocabulary.
+
+Lexicon format (CSV): word,polarity - negative polarity for negative
+words, positive for positive words, e.g. -1 / 0.5 / 1.
+"""
+import zlib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from token_store import tokenize
+
+TEST_LEXICON = 'data/lexicon/test_sentiment_lexicon.csv'
+
+# 2^20 buckets. n distinct tokens put about n^2 / 2^21 of them in a shared
+# bucket (roughly 15k of a 182k-token vocabulary), and a lexicon word shares
+# its bucket with some other token with probability 1 - exp(-n / 2^20), about
+# 16% at that size. Only short texts such as sentences are hashed; speeches are
+# scored over the exact token_store vocabulary. Collisions between lexicon
+# words themselves are reported by load_lexicon.
+HASH_BITS = 20
+N_FEATURES = 2 ** HASH_BITS
+
+def token_id(token):
+    """Stable hashed id of a token (crc32, unlike hash() it is the same in every process)"""
+    return zlib.crc32(token.encode('utf-8')) & (N_FEATURES - 1)
+
+def hashed_term_matrix(texts):
+    """Sparse (n_texts x N_FEATURES) token count matrix"""
+    tokens = tokenize(texts)
+    lengths = tokens.str.len().to_numpy()
+
+    # Hash each distinct token once
+    flat = [tok for toks in tokens for tok in toks]
+    ids = {tok: token_id(tok) for tok in set(flat)}
+
+    rows = np.repeat(np.arange(len(tokens)), lengths)
+    cols = np.fromiter((ids[tok] for tok in flat), dtype=np.int32, count=len(flat))
+
+    return sparse.csr_matrix((np.ones(len(flat), dtype=np.int32), (rows, cols)),
+                             shape=(len(tokens), N_FEATURES))
+
+def read_lexicon(path=TEST_LEXICON):
+    """Lexicon as a {word: polarity} dict"""
+    lexicon = pd.read_csv(path)
+    words = lexicon['word'].str.lower().str.strip()
+    return dict(zip(words, lexicon['polarity'].astype(float)))
+
+def lexicon_collisions(words):
+    """{token id: words} for hashed ids shared by more than one lexicon word"""
+    buckets = {}
+    for word in words:
+        buckets.setdefault(token_id(word), []).append(word)
+    return {tid: group for tid, group in buckets.items() if len(group) > 1}
+
+def load_lexicon(path=TEST_LEXICON):
+    """(negative, positive) weight vectors over hashed token ids"""
+    lexicon = read_lexicon(path)
+
+    # Words in a shared bucket would each be scored with their summed weights
+    for group in lexicon_collisions(lexicon).values():
+        print(f"⚠️  Lexicon words share a hashed id and are scored together: {', '.join(sorted(group))}")
+
+    ids = np.array([token_id(word) for word in lexicon], dtype=np.int64)
+    polarity = np.array(list(lexicon.values()))
+
+    negative = np.zeros(N_FEATURES)
+    positive = np.zeros(N_FEATURES)
+    np.add.at(negative, ids[polarity < 0], -polarity[polarity < 0])
+    np.add.at(positive, ids[polarity > 0], polarity[polarity > 0])
+
+    return negative, positive
+
+def corpus_lexicon(corpus, path=TEST_LEXICON):
+    """(negative, positive) weight vectors over the vocabulary of a TokenizedCorpus"""
+    lexicon = read_lexicon(path)
+    negative = corpus.term_vector({word: -p for word, p in lexicon.items() if p < 0})
+    positive = corpus.term_vector({word: p for word, p in lexicon.items() if p > 0})
+    return negative, positive
+
+def score_matrix(term_matrix, lexicon):
+    """Sentiment scores for every row of a term matrix, as a DataFrame"""
+    negative, positive = lexicon
+    n_tokens = np.asarray(term_matrix.sum(axis=1)).ravel()
+    neg = term_matrix @ negative
+    pos = term_matrix @ positive
+
+    # Avoid division by zero for empty texts
+    denom = np.maximum(n_tokens, 1)
+
+    return pd.DataFrame({
+        'n_tokens': n_tokens,
+        'negative': neg,
+        'positive': pos,
+        'negativity': neg / denom,
+        'positivity': pos / denom,
+        'net_sentiment': (pos - neg) / denom,
+    })
+
+def score_texts(texts, lexicon):
+    """Tokenize and score a batch of texts"""
+    return score_matrix(hashed_term_matrix(texts), lexicon)
@@ -0,0 +1,186 @@
+"""
+Speaker identity resolution.
+The parser keeps speaker headers as written, so one person shows up under
+several keys: with a ministerial title ("Statsrådet MIKAEL DAMBERG",
+"Närings- och innovationsminister MIKAEL DAMBERG"), as Ålderspresident, in
+mixed case, or with a "replik" suffix. Every distinct header is normalized
+once into a lookup table; variants are then merged within a blocking index
+keyed by (party, surname), so each name is only compared with the few names
+that share a block and resolution stays near-linear in the number of names.
+
+Two normalized names in a block are the same person when they have the same
+first name, the same "i <Place>" qualifier (the Riksdag's own way of telling
+namesakes apart) and one name's words contain the other's, e.g. YASMINE POSIO
+and YASMINE POSIO NILSSON.
+
+A new person's speaker_id is a CRC-32 of their canonical key (party, name,
+place), rehashed with a counter in the rare case of a collision. The ids are
+saved with every header variant in SPEAKERS_CSV and reused on the next run,
+so a person keeps their id even when a newly seen, longer variant changes
+the canonical name.
+
+Usage:
+    python scripts/speaker_resolution.py               # merged variants in the speeches dataset
+"""
+import argparse
+import os
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+SPEAKERS_CSV = 'data/processed/speakers.csv'
+
+# Words in front of the name: titles, their "X- och Y" compounds and the chair's roles
+TITLE_WORD = re.compile(r'^(?:\w*minister|statsråd(?:et)?|talman(?:nen)?|vice|förste|andre|tredje|'
+                        r'ålderspresident|och|\w+-)$', re.IGNORECASE)
+# Trailing markers that are not part of the name (lower case, unlike upper-case surnames)
+SUFFIX_PATTERN = re.compile(r'[\s:,]*\(?\b(?:replik|svar|forts\.?)\)?[\s:,]*$')
+
+def normalize_speaker(speaker):
+    """(NAME, place) of a speaker header: titles and suffixes dropped, name upper-cased"""
+    speaker = SUFFIX_PATTERN.sub('', ' '.join(str(speaker).split()))
+    words = speaker.split(' ')
+
+    # "JONAS ANDERSSON i Skellefteå": the place tells namesakes apart
+    place = ''
+    if 'i' in words[1:]:
+        at = words.index('i', 1)
+        place = ' '.join(words[at + 1:])
+        words = words[:at]
+
+    # Names are upper case in the headers, titles are not
+    while len(words) > 2 and not words[0].isupper() and TITLE_WORD.match(words[0]):
+        words = words[1:]
+
+    return ' '.join(words).upper(), place
+
+def person_key(party, name, place):
+    return f"{party}|{name}|{place}"
+
+def speaker_id(key):
+    return zlib.crc32(key.encode('utf-8'))
+
+def load_speaker_ids(path=SPEAKERS_CSV):
+    """(speaker header, party) -> speaker_id from a saved people table ({} if there is none)"""
+    if not os.path.exists(path):
+        return {}
+
+    people = pd.read_csv(path, dtype={'variants': str, 'party': str}, keep_default_na=False)
+    return {(variant, row.party): int(row.speaker_id)
+            for row in people.itertuples() for variant in row.variants.split(' | ')}
+
+class SpeakerResolver:
+    """Normalization table + (party, surname) blocking index over the distinct speakers"""
+
+    def __init__(self, known_ids=None):
+        # (speaker header, party) -> speaker_id assigned by an earlier run
+        self.known_ids = known_ids or {}
+        # person key -> speaker_id
+        self.ids = {}
+        # (speaker header, party) -> person key
+        self.table = {}
+        # person key -> name, place, party and name words; (party, surname) -> person keys
+        self.people = {}
+        self.blocks = {}
+
+    def fit(self, speakers, parties):
+        """Resolve every distinct (speaker, party) pair"""
+        pairs = pd.DataFrame({'speaker': speakers, 'party': parties}).astype(str).drop_duplicates()
+        normalized = {pair: normalize_speaker(pair[0]) for pair in zip(pairs['speaker'], pairs['party'])}
+
+        # Longest names first, so a shorter variant finds the full name already indexed
+        for (speaker, party), (name, place) in sorted(normalized.items(), key=lambda item: -len(item[1][0])):
+            self.table[(speaker, party)] = self.match(party, name, place)
+
+        self.assign_ids()
+        return self
+
+    def match(self, party, name, place):
+        """Person key of an existing person in the same block, or a new person"""
+        words = name.split(' ')
+        surnames = words[1:] or words
+
+        for surname in surnames:
+            for key in self.blocks.get((party, surname), ()):
+                other = self.people[key]
+                if (other['place'] == place and other['words'][0] == words[0]
+                        and set(words) <= set(other['words'])):
+                    return key
+
+        key = person_key(party, name, place)
+        if key not in self.people:
+            self.people[key] = {'name': name, 'place': place, 'party': party, 'words': words}
+            for surname in surnames:
+                self.blocks.setdefault((party, surname), []).append(key)
+        return key
+
+    def assign_ids(self):
+        """
+        speaker_id of every person: an id saved for one of their header variants
+        if there is one, otherwise the hash of their key. Keys are handled in
+        sorted order, so collisions are resolved the same way on every run.
+        """
+        variants = {}
+        for pair, key in self.table.items():
+            variants.setdefault(key, []).append(pair)
+        taken = set()
+
+        # Saved ids first, so existing people keep theirs
+        for key in sorted(self.people):
+            saved = sorted({self.known_ids[pair] for pair in variants.get(key, []) if pair in self.known_ids})
+            for candidate in saved:
+                if candidate not in taken:
+                    self.ids[key] = candidate
+                    taken.add(candidate)
+                    break
+
+        for key in sorted(self.people):
+            if key in self.ids:
+                continue
+            candidate, salt = speaker_id(key), 0
+            while candidate in taken:
+                salt += 1
+                candidate = speaker_id(f"{key}#{salt}")
+                print(f"⚠️  speaker_id collision for {key}: rehashed with #{salt}")
+            self.ids[key] = candidate
+            taken.add(candidate)
+
+    def speaker_ids(self, speakers, parties):
+        """speaker_id of every row, looked up once per distinct (speaker, party)"""
+        pairs = pd.DataFrame({'speaker': speakers, 'party': parties}).astype(str)
+        codes, uniques = pd.MultiIndex.from_frame(pairs).factorize()
+        ids = np.array([self.ids[self.table[pair]] for pair in uniques], dtype=np.int64)
+        return pd.Series(ids[codes], index=pairs.index, name='speaker_id')
+
+    def people_table(self):
+        """One row per resolved person, with all header variants"""
+        variants = {}
+        for (speaker, _), key in self.table.items():
+            variants.setdefault(key, []).append(speaker)
+
+        rows = [{'speaker_id': self.ids[key], 'name': person['name'], 'place': person['place'],
+                 'party': person['party'], 'variants': sorted(variants.get(key, []))}
+                for key, person in self.people.items()]
+        return pd.DataFrame(rows).sort_values(['name', 'party']).reset_index(drop=True)
+
+def resolve_speakers(speakers, parties, known_ids=None):
+    """(speaker_id per row, people table) for speaker and party columns, reusing known_ids"""
+    resolver = SpeakerResolver(known_ids).fit(speakers, parties)
+    return resolver.speaker_ids(speakers, parties), resolver.people_table()
+
+if __name__ == "__main__":
+    from compact_store import load_speeches
+
+    parser = argparse.ArgumentParser(description="Show how speaker headers are resolved to people")
+    parser.add_argument('--all', action='store_true', help="List every person, not only merged ones")
+    args = parser.parse_args()
+
+    df = load_speeches(columns=['speaker', 'party'])
+    ids, people = resolve_speakers(df['speaker'], df['party'], load_speaker_ids())
+
+    print(f"🧑 {df['speaker'].nunique():,} speaker headers -> {len(people):,} people")
+    shown = people if args.all else people[people['variants'].str.len() > 1]
+    for row in shown.itertuples():
+        place = f" i {row.place}" if row.place else ''
+        print(f"   {row.speaker_id:>10}  {row.name}{place} ({row.party}): {' | '.join(row.variants)}")
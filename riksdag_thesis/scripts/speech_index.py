@@ -0,0 +1,173 @@
+"""
+Speech boundary index.
+The parser records where every speech sits in its raw transcript file, so a
+single speech can be read back in its original HTML context (or re-extracted
+with a changed cleaner) without re-parsing the whole protocol. The index is a
+few flat numpy arrays with one row per speech, grouped by document, saved in
+one .npz file.
+
+Arrays in SPEECH_INDEX_FILE:
+    dok_ids                 sorted document ids
+    doc_ptr                 rows of dok_ids[i] are doc_ptr[i]:doc_ptr[i + 1]
+    speech_id               speech_id of every row
+    speech_number           'Anf.' number (-1 for <h2> speakers without one)
+    byte_start, byte_end    byte range in the raw file (-1 if unknown, e.g. soup engine)
+    speaker, party          codes into the speakers / parties tables
+    speaker_id              resolved person (speaker_resolution.py), -1 if not resolved
+
+Usage:
+    python scripts/speech_index.py info
+    python scripts/speech_index.py show H50974 75           # raw HTML of Anf. 75
+    python scripts/speech_index.py show H50974 75 --text    # decoded speech text
+"""
+import argparse
+import html
+import os
+import numpy as np
+import pandas as pd
+from transcript_archive import TRANSCRIPT_DIR, ARCHIVE_FILE, read_transcript_bytes
+
+SPEECH_INDEX_FILE = 'data/processed/speech_index.npz'
+
+class SpeechIndex:
+    """Per-document speech boundaries as flat arrays"""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.dok_ids = arrays['dok_ids']
+        self.doc_ptr = arrays['doc_ptr']
+        self.speakers = arrays['speakers']
+        self.parties = arrays['parties']
+
+    @classmethod
+    def build(cls, speeches):
+        """
+        Index from a speeches DataFrame with speech_id, dok_id, speech_number,
+        speaker, party, byte_start and byte_end columns
+        """
+        speeches = speeches.sort_values(['dok_id', 'speech_id'], kind='stable')
+        dok_ids = speeches['dok_id'].astype(str).to_numpy()
+        speakers = pd.Categorical(speeches['speaker'].astype(str))
+        parties = pd.Categorical(speeches['party'].astype(str))
+
+        doc_ids, doc_starts = np.unique(dok_ids, return_index=True)
+
+        return cls({
+            'dok_ids': doc_ids.astype(str),
+            'doc_ptr': np.append(doc_starts, len(dok_ids)).astype(np.int64),
+            'speech_id': speeches['speech_id'].to_numpy(dtype=np.int64),
+            'speech_number': pd.to_numeric(speeches['speech_number'], errors='coerce')
+                               .fillna(-1).to_numpy(dtype=np.int32),
+            'byte_start': speeches['byte_start'].fillna(-1).to_numpy(dtype=np.int64),
+            'byte_end': speeches['byte_end'].fillna(-1).to_numpy(dtype=np.int64),
+            'speaker': speakers.codes.astype(np.int32),
+            'speaker_id': (speeches['speaker_id'].to_numpy(dtype=np.int64) if 'speaker_id' in speeches.columns
+                           else np.full(len(speeches), -1, dtype=np.int64)),
+            'party': parties.codes.astype(np.int8),
+            'speakers': np.asarray(speakers.categories, dtype=str),
+            'parties': np.asarray(parties.categories, dtype=str),
+        })
+
+    def save(self, path=SPEECH_INDEX_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, **self.arrays)
+
+    @classmethod
+    def load(cls, path=SPEECH_INDEX_FILE):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    @staticmethod
+    def exists(path=SPEECH_INDEX_FILE):
+        return os.path.exists(path)
+
+    def __len__(self):
+        return len(self.arrays['speech_id'])
+
+    def document_rows(self, dok_id):
+        """Row range of a document's speeches (empty if it has none)"""
+        i = np.searchsorted(self.dok_ids, dok_id)
+        if i == len(self.dok_ids) or self.dok_ids[i] != dok_id:
+            return range(0)
+        return range(self.doc_ptr[i], self.doc_ptr[i + 1])
+
+    def speeches(self, dok_id):
+        """One row per speech of a document, as a DataFrame"""
+        rows = self.document_rows(dok_id)
+        a = {name: self.arrays[name][rows.start:rows.stop]
+             for name in ('speech_id', 'speech_number', 'byte_start', 'byte_end',
+                          'speaker', 'speaker_id', 'party')}
+
+        return pd.DataFrame({
+            'speech_id': a['speech_id'],
+            'speech_number': a['speech_number'],
+            'speaker': self.speakers[a['speaker']],
+            'speaker_id': a['speaker_id'],
+            'party': self.parties[a['party']],
+            'byte_start': a['byte_start'],
+            'byte_end': a['byte_end'],
+        })
+
+    def find(self, dok_id, speech_number):
+        """Index rows of 'Anf. <speech_number>' in a document (a number can occur twice)"""
+        rows = self.document_rows(dok_id)
+        numbers = self.arrays['speech_number'][rows.start:rows.stop]
+        return [rows.start + i for i in np.flatnonzero(numbers == int(speech_number))]
+
+    def raw_html(self, row, transcript_dir=TRANSCRIPT_DIR, archive_path=ARCHIVE_FILE):
+        """The speech's slice of the raw transcript (still XML-escaped HTML), or None if unknown"""
+        start, end = self.arrays['byte_start'][row], self.arrays['byte_end'][row]
+        if start < 0 or end < 0:
+            return None
+
+        dok_id = self.dok_ids[np.searchsorted(self.doc_ptr, row, side='right') - 1]
+        data = read_transcript_bytes(os.path.join(transcript_dir, f"{dok_id}.txt"), archive_path)
+        return str(data[start:end], 'utf-8')
+
+def speech_html_text(raw):
+    """Readable text of a raw slice: unescape the XML layer, then the HTML entities, drop tags"""
+    from lxml import html as lxml_html
+
+    fragment = lxml_html.fragment_fromstring(html.unescape(raw), create_parent='div')
+    return ' '.join(fragment.text_content().split())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the speech boundary index")
+    parser.add_argument('command', choices=['info', 'show'])
+    parser.add_argument('dok_id', nargs='?', help="With show: document")
+    parser.add_argument('speech_number', nargs='?', type=int, help="With show: 'Anf.' number")
+    parser.add_argument('--text', action='store_true', help="With show: print decoded text instead of HTML")
+    parser.add_argument('--index', default=SPEECH_INDEX_FILE)
+    args = parser.parse_args()
+
+    index = SpeechIndex.load(args.index)
+
+    if args.command == 'info':
+        known = (index.arrays['byte_start'] >= 0).sum()
+        print(f"📇 Speech index: {args.index}")
+        print(f"   Documents: {len(index.dok_ids):,}")
+        print(f"   Speeches: {len(index):,} ({known:,} with byte offsets)")
+        print(f"   Speakers: {len(index.speakers):,}, parties: {len(index.parties)}")
+        print(f"   Size: {os.path.getsize(args.index) / 1024:.0f} KB")
+    elif args.dok_id is None:
+        parser.error("show needs a dok_id")
+    elif args.speech_number is None:
+        print(index.speeches(args.dok_id).to_string(index=False))
+    else:
+        rows = index.find(args.dok_id, args.speech_number)
+        if not rows:
+            raise SystemExit(f"❌ No Anf. {args.speech_number} in {args.dok_id}")
+
+        for row in rows:
+            raw = index.raw_html(row)
+            speaker = index.speakers[index.arrays['speaker'][row]]
+            party = index.parties[index.arrays['party'][row]]
+            print(f"📄 {args.dok_id} Anf. {args.speech_number}: {speaker} ({party}), "
+                  f"speech_id {index.arrays['speech_id'][row]}, speaker_id {index.arrays['speaker_id'][row]}, "
+                  f"bytes {index.arrays['byte_start'][row]}-{index.arrays['byte_end'][row]}")
+            print("-" * 70)
+            if raw is None:
+                print("(no byte offsets: parsed with the soup engine)")
+            else:
+                print(speech_html_text(raw) if args.text else raw)
+            print()
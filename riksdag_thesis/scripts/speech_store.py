@@ -0,0 +1,141 @@
+"""
+Columnar storage for the speeches corpus.
+Speeches are written as a Parquet dataset partitioned by year, with
+dictionary-encoded (categorical) string columns and a zstd-compressed
+text column. Readers load only the columns they ask for.
+
+Falls back to the CSV files when pyarrow is not installed.
+"""
+import os
+import pandas as pd
+
+SPEECHES_DATASET = 'data/processed/speeches_parquet'
+SPEECHES_CSV = 'data/processed/all_speeches.csv'
+OPPONENTS_DATASET = 'data/processed/opponent_refs.parquet'
+OPPONENTS_CSV = 'data/processed/speeches_with_opponents.csv'
+
+# Low-cardinality strings: stored once per row group, loaded as pandas categoricals
+CATEGORICAL_COLUMNS = ['speaker', 'party', 'dok_id', 'datum', 'titel', 'rm', 'systemdatum', 'status', 'hangar_id']
+PARTITION_COLUMNS = ['year']
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def to_categoricals(df):
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def write_speeches(df, path=SPEECHES_DATASET, include_text=True, text_codec='zstd'):
+    """Write speeches as a year-partitioned Parquet dataset (replaces any existing one)"""
+    import shutil
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not include_text:
+        df = df.drop(columns=['text'], errors='ignore')
+
+    table = pa.Table.from_pandas(to_categoricals(df), preserve_index=False)
+
+    # Text dominates the file size, so it gets the stronger codec
+    compression = {name: 'snappy' for name in table.column_names}
+    if 'text' in compression:
+        compression['text'] = text_codec
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+    pq.write_to_dataset(table, path, partition_cols=PARTITION_COLUMNS, compression=compression)
+
+def read_speeches(columns=None, path=SPEECHES_DATASET, csv_path=SPEECHES_CSV, filters=None):
+    """
+    Load the speeches, optionally only some columns and/or rows.
+    filters uses pyarrow syntax, e.g. [('year', '>=', 2022)].
+    """
+    if has_pyarrow() and os.path.exists(path):
+        df = pd.read_parquet(path, columns=columns, filters=filters)
+
+        # Partition values come back as categories of strings
+        for col in PARTITION_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype(int)
+        return df
+
+    print(f"⚠️  {path} not available, reading {csv_path}")
+    df = pd.read_csv(csv_path, usecols=columns)
+    if filters:
+        for col, op, value in filters:
+            df = df.query(f"`{col}` {op} @value")
+
+    return to_categoricals(df)
+
+def write_table(df, path):
+    """Write a small unpartitioned table (e.g. per-speech analysis columns)"""
+    df.to_parquet(path, index=False)
+
+def read_table(path, columns=None, csv_path=None):
+    """Read a table written by write_table, falling back to its CSV export"""
+    if has_pyarrow() and os.path.exists(path):
+        return pd.read_parquet(path, columns=columns)
+
+    print(f"⚠️  {path} not available, reading {csv_path}")
+    return pd.read_csv(csv_path, usecols=columns)
+
+def iter_speech_batches(columns=None, batch_size=5000, path=SPEECHES_DATASET, csv_path=SPEECHES_CSV):
+    """Yield the speeches as DataFrames of at most batch_size rows, never the whole corpus at once"""
+    if has_pyarrow() and os.path.exists(path):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+
+    print(f"⚠️  {path} not available, streaming {csv_path}")
+    yield from pd.read_csv(csv_path, usecols=columns, chunksize=batch_size)
+
+class ChunkedWriter:
+    """Append DataFrame chunks to one Parquet file (or a CSV without pyarrow)"""
+
+    def __init__(self, path, columns):
+        self.columns = columns
+        self.use_parquet = has_pyarrow() and path.endswith('.parquet')
+        self.path = path if self.use_parquet or path.endswith('.csv') else os.path.splitext(path)[0] + '.csv'
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def write(self, df):
+        df = df[self.columns]
+        if len(df) == 0:
+            return
+
+        if self.use_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            # First chunk fixes the schema; later chunks are cast to it
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            if self.writer is None:
+                self.schema = table.schema
+                self.writer = pq.ParquetWriter(self.path, self.schema, compression='zstd')
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a', header=self.rows == 0, index=False, encoding='utf-8')
+
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
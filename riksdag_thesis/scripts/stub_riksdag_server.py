@@ -0,0 +1,115 @@
+"""
+Local stub of the Riksdag document API for testing downloads offline.
+Serves the already downloaded transcripts as /dokument/<dok_id>.txt
+and the saved metadata as a paged /dokumentlista/ endpoint.
+
+Usage:
+    python scripts/stub_riksdag_server.py --port 8765
+    python scripts/03_download_transcripts.py --base-url http://localhost:8765/dokument/ --output-dir /tmp/transcripts
+"""
+import argparse
+import json
+import math
+import os
+import re
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+DOC_PATH = re.compile(r'^/dokument/([A-Za-z0-9]+)\.txt$')
+
+def dokumentlista_page(documents, query, base_url):
+    """Filter, sort and page documents the way the real API does"""
+    start = query.get('from', [''])[0]
+    end = query.get('tom', [''])[0]
+    sort = query.get('sort', ['datum'])[0]
+    descending = query.get('sortorder', ['asc'])[0] == 'desc'
+    page = int(query.get('p', ['1'])[0])
+    size = int(query.get('sz', ['20'])[0])
+
+    hits = [d for d in documents
+            if (not start or d['datum'] >= start) and (not end or d['datum'][:10] <= end)]
+    hits.sort(key=lambda d: d.get(sort) or d['datum'], reverse=descending)
+
+    pages = max(1, math.ceil(len(hits) / size))
+    result = {
+        '@traffar': str(len(hits)),
+        '@sida': str(page),
+        '@sidor': str(pages),
+        'dokument': hits[(page - 1) * size:page * size],
+    }
+    if page < pages:
+        next_query = {k: v[0] for k, v in query.items()}
+        next_query['p'] = page + 1
+        result['@nasta_sida'] = f"{base_url}?{urlencode(next_query)}"
+
+    return {'dokumentlista': result}
+
+def make_handler(transcript_dir, metadata_file=None):
+    """Build a request handler serving files from transcript_dir"""
+
+    documents = []
+    if metadata_file and os.path.exists(metadata_file):
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            documents = [{k: v for k, v in d.items() if k in ('dok_id', 'rm', 'beteckning', 'titel',
+                                                              'datum', 'systemdatum', 'debattnamn')}
+                         for d in json.load(f)]
+
+    class StubHandler(BaseHTTPRequestHandler):
+        # Keep-alive, like the real API
+        protocol_version = 'HTTP/1.1'
+
+        def send_body(self, body, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+
+            if url.path.rstrip('/') == '/dokumentlista':
+                base_url = f"http://{self.headers.get('Host')}/dokumentlista/"
+                page = dokumentlista_page(documents, parse_qs(url.query), base_url)
+                self.send_body(json.dumps(page, ensure_ascii=False).encode('utf-8'), 'application/json')
+                return
+
+            match = DOC_PATH.match(url.path)
+            filepath = os.path.join(transcript_dir, f"{match.group(1)}.txt") if match else None
+
+            if filepath is None or not os.path.isfile(filepath):
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            with open(filepath, 'rb') as f:
+                body = f.read()
+
+            self.send_body(body, 'text/plain; charset=utf-8')
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+def serve(transcript_dir='data/raw/transcripts', host='127.0.0.1', port=8765,
+          metadata_file='data/raw/riksdag_debates_metadata.json'):
+    """Create (but do not start) a threaded stub server"""
+    return ThreadingHTTPServer((host, port), make_handler(transcript_dir, metadata_file))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve local transcripts like the Riksdag API")
+    parser.add_argument('--dir', default='data/raw/transcripts')
+    parser.add_argument('--metadata', default='data/raw/riksdag_debates_metadata.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = serve(args.dir, args.host, args.port, args.metadata)
+    print(f"🧪 Stub Riksdag API on http://{args.host}:{args.port}/dokument/ (serving {args.dir})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,196 @@
+"""
+Tokenized corpus store.
+The speeches are tokenized once into a vocabulary and a sparse (CSR)
+document-term matrix whose rows line up with speech_id. Word counts,
+keyword detection and lexicon scoring then run as sparse operations on
+the matrix instead of re-tokenizing the text column.
+
+Files in TOKENS_DIR:
+    vocabulary.txt   one token per line, line number = column id
+    dtm.npz          scipy CSR matrix, speeches x vocabulary, token counts
+    speech_ids.npy   speech_id of every matrix row
+    source.json      modification time of the speeches dataset it was built from
+
+Usage:
+    python scripts/token_store.py build
+    python scripts/token_store.py info
+"""
+import argparse
+import json
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from speech_store import iter_speech_batches, SPEECHES_DATASET
+
+TOKENS_DIR = 'data/processed/tokens'
+STORE_FILES = ('vocabulary.txt', 'dtm.npz', 'speech_ids.npy', 'source.json')
+
+# Words (letters incl. åäö, hyphenated compounds kept together)
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:-[^\W\d_]+)*")
+
+def tokenize(texts):
+    """Lowercased word tokens per text, as a Series of lists"""
+    return pd.Series(texts).fillna('').str.lower().str.findall(TOKEN_PATTERN)
+
+def count_matrix(tokens, index, grow=True):
+    """
+    CSR count matrix for a Series of token lists, columns from index (token -> id).
+    New tokens are added to index when grow is True, otherwise skipped.
+    """
+    flat = [tok for toks in tokens for tok in toks]
+    rows = np.repeat(np.arange(len(tokens)), tokens.str.len().to_numpy())
+
+    if grow:
+        for tok in flat:
+            if tok not in index:
+                index[tok] = len(index)
+        cols = np.fromiter((index[tok] for tok in flat), dtype=np.int32, count=len(flat))
+    else:
+        cols = np.fromiter((index.get(tok, -1) for tok in flat), dtype=np.int32, count=len(flat))
+        known = cols >= 0
+        rows, cols = rows[known], cols[known]
+
+    # Duplicate (row, col) pairs are summed into counts
+    matrix = sparse.csr_matrix((np.ones(len(cols), dtype=np.int32), (rows, cols)),
+                               shape=(len(tokens), len(index)))
+    matrix.sum_duplicates()
+    return matrix
+
+def source_modified(path=SPEECHES_DATASET):
+    """Modification time of the speeches dataset (changes whenever 04 rewrites it)"""
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+class TokenizedCorpus:
+    """Vocabulary + document-term matrix, rows aligned with speech_ids"""
+
+    def __init__(self, vocabulary, matrix, speech_ids, source_mtime=None):
+        self.vocabulary = vocabulary
+        self.matrix = matrix
+        self.speech_ids = speech_ids
+        self.source_mtime = source_mtime
+        self.index = {tok: i for i, tok in enumerate(vocabulary)}
+
+    @classmethod
+    def build(cls, batch_size=5000):
+        """Tokenize every speech once, streaming the speeches in batches"""
+        source_mtime = source_modified()
+        index = {}
+        blocks, ids = [], []
+
+        for batch in iter_speech_batches(['speech_id', 'text'], batch_size):
+            blocks.append(count_matrix(tokenize(batch['text']), index))
+            ids.append(batch['speech_id'].to_numpy())
+
+        # Earlier blocks were built with a smaller vocabulary; pad them to the final width
+        n_terms = len(index)
+        blocks = [sparse.csr_matrix((b.data, b.indices, b.indptr), shape=(b.shape[0], n_terms))
+                  for b in blocks]
+
+        matrix = sparse.vstack(blocks, format='csr') if blocks else sparse.csr_matrix((0, 0), dtype=np.int32)
+        speech_ids = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+
+        # Store rows in speech_id order so row i is easy to join
+        order = np.argsort(speech_ids, kind='stable')
+        return cls(list(index), matrix[order], speech_ids[order], source_mtime)
+
+    def save(self, directory=TOKENS_DIR):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'vocabulary.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.vocabulary))
+        sparse.save_npz(os.path.join(directory, 'dtm.npz'), self.matrix)
+        np.save(os.path.join(directory, 'speech_ids.npy'), self.speech_ids)
+        with open(os.path.join(directory, 'source.json'), 'w') as f:
+            json.dump({'source_mtime': self.source_mtime}, f)
+
+    @classmethod
+    def load(cls, directory=TOKENS_DIR):
+        with open(os.path.join(directory, 'vocabulary.txt'), encoding='utf-8') as f:
+            vocabulary = f.read().split('\n')
+        matrix = sparse.load_npz(os.path.join(directory, 'dtm.npz')).tocsr()
+        speech_ids = np.load(os.path.join(directory, 'speech_ids.npy'))
+        with open(os.path.join(directory, 'source.json')) as f:
+            source_mtime = json.load(f)['source_mtime']
+        return cls(vocabulary, matrix, speech_ids, source_mtime)
+
+    @staticmethod
+    def exists(directory=TOKENS_DIR):
+        return all(os.path.exists(os.path.join(directory, name)) for name in STORE_FILES)
+
+    @classmethod
+    def load_current(cls, directory=TOKENS_DIR):
+        """The stored corpus if it was built from the current speeches dataset, else None"""
+        if not cls.exists(directory):
+            return None
+
+        corpus = cls.load(directory)
+        if corpus.source_mtime != source_modified():
+            print(f"⚠️  {directory} is older than the speeches, rebuild it with: python scripts/token_store.py build")
+            return None
+        return corpus
+
+    def word_counts(self):
+        """Number of tokens in every speech"""
+        return np.asarray(self.matrix.sum(axis=1)).ravel()
+
+    def term_vector(self, weights):
+        """Dense vector over the vocabulary from a {token: weight} mapping (unknown tokens ignored)"""
+        vector = np.zeros(len(self.vocabulary))
+        for token, weight in weights.items():
+            i = self.index.get(token)
+            if i is not None:
+                vector[i] += weight
+        return vector
+
+    def term_groups(self, groups):
+        """Sparse (vocabulary x len(groups)) matrix; groups is a list of token -> hits mappings"""
+        rows, cols, data = [], [], []
+        for col, group in enumerate(groups):
+            for token, hits in group.items():
+                i = self.index.get(token)
+                if i is not None:
+                    rows.append(i)
+                    cols.append(col)
+                    data.append(hits)
+
+        return sparse.csr_matrix((np.array(data, dtype=np.int32), (rows, cols)),
+                                 shape=(len(self.vocabulary), len(groups)))
+
+    def group_counts(self, groups):
+        """Hits per speech for each group of tokens, as a sparse (speeches x groups) matrix"""
+        return self.matrix @ self.term_groups(groups)
+
+    def rows_for(self, speech_ids):
+        """Matrix row of each speech id (rows are sorted by speech_id); None if any id is missing"""
+        speech_ids = np.asarray(speech_ids)
+        rows = np.searchsorted(self.speech_ids, speech_ids)
+        rows = np.minimum(rows, len(self.speech_ids) - 1)
+
+        if len(self.speech_ids) == 0 or not (self.speech_ids[rows] == speech_ids).all():
+            return None
+        return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the tokenized corpus")
+    parser.add_argument('command', choices=['build', 'info'])
+    parser.add_argument('--dir', default=TOKENS_DIR)
+    parser.add_argument('--batch-size', type=int, default=5000, help="Speeches per batch")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print("🔤 Tokenizing speeches...")
+        start = time.time()
+        corpus = TokenizedCorpus.build(args.batch_size)
+        corpus.save(args.dir)
+        print(f"✅ Saved: {args.dir} ({time.time() - start:.1f}s)")
+    else:
+        corpus = TokenizedCorpus.load(args.dir)
+
+    size = sum(os.path.getsize(os.path.join(args.dir, name)) for name in os.listdir(args.dir))
+    print(f"📦 Tokenized corpus: {args.dir}")
+    print(f"   Speeches: {corpus.matrix.shape[0]:,}")
+    print(f"   Vocabulary: {len(corpus.vocabulary):,} tokens")
+    print(f"   Tokens: {corpus.matrix.sum():,}")
+    print(f"   Size: {size / 1024 ** 2:.1f} MB")
@@ -0,0 +1,237 @@
+"""
+Packed archive of the raw transcripts.
+All transcripts are concatenated into one data file with a JSON index of
+dok_id -> (offset, length, raw length, sha256, file mtime). Readers mmap the data file
+and slice documents out of it without copying, instead of opening and
+reading hundreds of loose files. Records can optionally be zstd
+compressed (uses the pyarrow codec, so no extra dependency).
+
+A document is only read from the archive while its loose file (if there is
+one) still has the size and mtime it had when packed, so a re-downloaded
+transcript is never served from a stale pack.
+
+Usage:
+    python scripts/transcript_archive.py pack                  # uncompressed
+    python scripts/transcript_archive.py pack --compress zstd
+    python scripts/transcript_archive.py info
+    python scripts/transcript_archive.py cat H509121 | head
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+
+TRANSCRIPT_DIR = 'data/raw/transcripts'
+ARCHIVE_FILE = 'data/raw/transcripts.pack'
+INDEX_SUFFIX = '.index.json'
+ARCHIVE_VERSION = 2
+
+def index_path(archive_path):
+    return archive_path + INDEX_SUFFIX
+
+def file_signature(path):
+    """(size, mtime in ns) of a file"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def zstd_codec(level=None):
+    import pyarrow as pa
+    return pa.Codec('zstd', compression_level=level)
+
+def transcript_ids(transcript_dir=TRANSCRIPT_DIR):
+    """dok_ids of the transcript files in a directory, sorted"""
+    return sorted(f[:-4] for f in os.listdir(transcript_dir)
+                  if f.endswith('.txt') and f != 'failed_downloads.txt')
+
+def pack_transcripts(transcript_dir=TRANSCRIPT_DIR, archive_path=ARCHIVE_FILE, compression=None, level=None):
+    """Write every transcript in transcript_dir into one archive; returns the index"""
+    codec = zstd_codec(level) if compression == 'zstd' else None
+    records = {}
+    offset = 0
+    tmp_path = f"{archive_path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, 'wb') as out:
+        for dok_id in transcript_ids(transcript_dir):
+            with open(os.path.join(transcript_dir, f"{dok_id}.txt"), 'rb') as f:
+                raw = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+
+            stored = codec.compress(raw, asbytes=True) if codec else raw
+            out.write(stored)
+            records[dok_id] = [offset, len(stored), len(raw), hashlib.sha256(raw).hexdigest(), mtime]
+            offset += len(stored)
+
+    index = {'version': ARCHIVE_VERSION, 'compression': compression, 'records': records}
+
+    # Data file first, index last: a readable index always points into a complete data file
+    os.replace(tmp_path, archive_path)
+    with open(index_path(archive_path) + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_path(archive_path) + '.tmp', index_path(archive_path))
+
+    return index
+
+class TranscriptArchive:
+    """Read-only, memory-mapped view of a packed archive"""
+
+    def __init__(self, archive_path=ARCHIVE_FILE):
+        self.path = archive_path
+
+        with open(index_path(archive_path)) as f:
+            index = json.load(f)
+        # Archives of another version are readable but never current (older ones have no mtimes)
+        self.version = index['version']
+
+        self.records = index['records']
+        self.compression = index['compression']
+        self.codec = zstd_codec() if self.compression == 'zstd' else None
+
+        self._file = open(archive_path, 'rb')
+        # mmap cannot map an empty file
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._view = memoryview(self._map)
+
+    @staticmethod
+    def exists(archive_path=ARCHIVE_FILE):
+        return os.path.exists(archive_path) and os.path.exists(index_path(archive_path))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, dok_id):
+        return dok_id in self.records
+
+    def ids(self):
+        return sorted(self.records)
+
+    def digest(self, dok_id):
+        """SHA-256 of the original file content, recorded when packing"""
+        return self.records[dok_id][3]
+
+    def get_bytes(self, dok_id):
+        """
+        The document's raw bytes. Uncompressed archives return a zero-copy
+        memoryview into the mapped file; compressed ones a decompressed bytes object.
+        """
+        offset, length, raw_length = self.records[dok_id][:3]
+        view = self._view[offset:offset + length]
+
+        if self.codec:
+            return self.codec.decompress(view, decompressed_size=raw_length, asbytes=True)
+        return view
+
+    def get_text(self, dok_id):
+        return str(self.get_bytes(dok_id), 'utf-8')
+
+    def is_current_document(self, dok_id, filepath):
+        """
+        True if the archive's copy of dok_id can stand in for filepath: the file
+        has the size and mtime recorded when packing, or there is no file.
+        """
+        if self.version != ARCHIVE_VERSION or dok_id not in self.records:
+            return False
+        try:
+            signature = file_signature(filepath)
+        except FileNotFoundError:
+            return True
+
+        record = self.records[dok_id]
+        return signature == (record[2], record[4])
+
+    def is_current(self, transcript_dir=TRANSCRIPT_DIR):
+        """True if the archive holds exactly the transcripts currently in transcript_dir, unchanged"""
+        if self.version != ARCHIVE_VERSION:
+            return False
+        if not os.path.isdir(transcript_dir):
+            return True
+        return (transcript_ids(transcript_dir) == self.ids()
+                and all(self.is_current_document(dok_id, os.path.join(transcript_dir, f"{dok_id}.txt"))
+                        for dok_id in self.records))
+
+    def close(self):
+        self._view.release()
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a slice; the map is freed once it is released
+                pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# One open archive per process (parser workers reuse it for every file)
+_open_archives = {}
+
+def open_archive(archive_path=ARCHIVE_FILE):
+    if archive_path not in _open_archives:
+        _open_archives[archive_path] = TranscriptArchive(archive_path)
+    return _open_archives[archive_path]
+
+def current_archive(filepath, archive_path=ARCHIVE_FILE):
+    """(archive, dok_id) if the archive has an up-to-date copy of the transcript at filepath, else None"""
+    dok_id = os.path.splitext(os.path.basename(filepath))[0]
+
+    if TranscriptArchive.exists(archive_path):
+        archive = open_archive(archive_path)
+        if archive.is_current_document(dok_id, filepath):
+            return archive, dok_id
+    return None
+
+def read_transcript(filepath, archive_path=ARCHIVE_FILE):
+    """
+    Text of a transcript given its file path (data/raw/transcripts/<dok_id>.txt):
+    from the archive when it has an up-to-date copy, otherwise from the file.
+    """
+    found = current_archive(filepath, archive_path)
+    if found:
+        archive, dok_id = found
+        return archive.get_text(dok_id)
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def read_transcript_bytes(filepath, archive_path=ARCHIVE_FILE):
+    """Raw bytes of a transcript (as in the file on disk), from the archive when it has an up-to-date copy"""
+    found = current_archive(filepath, archive_path)
+    if found:
+        archive, dok_id = found
+        return archive.get_bytes(dok_id)
+
+    with open(filepath, 'rb') as f:
+        return f.read()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack or inspect the transcript archive")
+    parser.add_argument('command', choices=['pack', 'info', 'cat'])
+    parser.add_argument('dok_id', nargs='?', help="With cat: document to print")
+    parser.add_argument('--dir', default=TRANSCRIPT_DIR)
+    parser.add_argument('--archive', default=ARCHIVE_FILE)
+    parser.add_argument('--compress', choices=['zstd'], default=None, help="Compress every record")
+    parser.add_argument('--level', type=int, default=None, help="zstd compression level")
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        index = pack_transcripts(args.dir, args.archive, args.compress, args.level)
+        print(f"✅ Packed {len(index['records']):,} transcripts into {args.archive}")
+
+    if args.command == 'cat':
+        with TranscriptArchive(args.archive) as archive:
+            sys.stdout.write(archive.get_text(args.dok_id))
+    else:
+        with TranscriptArchive(args.archive) as archive:
+            raw = sum(record[2] for record in archive.records.values())
+            stored = os.path.getsize(args.archive)
+            print(f"📦 Archive: {args.archive}")
+            print(f"   Documents: {len(archive):,}")
+            print(f"   Version: {archive.version}" + ("" if archive.version == ARCHIVE_VERSION else " (re-pack)"))
+            print(f"   Compression: {archive.compression or 'none'}")
+            print(f"   Size: {stored / 1024 ** 2:.1f} MB ({raw / 1024 ** 2:.1f} MB uncompressed)")
+            print(f"   Matches {args.dir}: {archive.is_current(args.dir)}")
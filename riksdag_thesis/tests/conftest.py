@@ -0,0 +1,30 @@
+"""
+Shared fixtures: scripts/ on sys.path and the stub Riksdag API on an ephemeral port.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from stub_riksdag_server import serve
+
+@pytest.fixture
+def stub_api():
+    """Start the stub API serving (transcript_dir, metadata_file); returns its root URL"""
+    servers = []
+
+    def start(transcript_dir, metadata_file=None):
+        server = serve(str(transcript_dir), port=0, metadata_file=str(metadata_file) if metadata_file else None)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address
+        return f"http://{host}:{port}"
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,49 @@
+"""
+Transcript downloads against the stub Riksdag API.
+Run from riksdag_thesis/: python -m pytest -q tests
+"""
+import importlib
+import os
+
+import pandas as pd
+
+from download_manifest import DownloadManifest, sha256_bytes
+
+download_module = importlib.import_module('03_download_transcripts')
+
+TRANSCRIPT_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'transcripts')
+MISSING_ID = 'HMISSING1'
+
+def bundled_ids(n=20):
+    return sorted(f[:-4] for f in os.listdir(TRANSCRIPT_DIR) if f.endswith('.txt'))[:n]
+
+def test_download_matches_served_bytes_and_manifest(tmp_path, stub_api):
+    dok_ids = bundled_ids()
+    metadata_file = tmp_path / 'metadata.csv'
+    pd.DataFrame({'dok_id': dok_ids + [MISSING_ID]}).to_csv(metadata_file, index=False)
+    output_dir = tmp_path / 'transcripts'
+    api = stub_api(TRANSCRIPT_DIR)
+
+    successful, failed = download_module.download_all_transcripts(
+        str(metadata_file), str(output_dir), workers=4, rate=1000, base_url=f"{api}/dokument/")
+
+    assert successful == len(dok_ids)
+    assert failed == [MISSING_ID]
+
+    manifest = DownloadManifest(str(output_dir / download_module.MANIFEST_NAME))
+    for dok_id in dok_ids:
+        with open(os.path.join(TRANSCRIPT_DIR, f"{dok_id}.txt"), 'rb') as f:
+            expected = f.read()
+        assert (output_dir / f"{dok_id}.txt").read_bytes() == expected
+
+        entry = manifest.get(dok_id)
+        assert entry['state'] == 'done'
+        assert entry['bytes'] == len(expected)
+        assert entry['sha256'] == sha256_bytes(expected)
+        assert entry['http_status'] == 200
+
+    # A 404 is permanent: recorded with its status after a single attempt
+    entry = manifest.get(MISSING_ID)
+    assert entry['state'] == 'failed'
+    assert entry['http_status'] == 404
+    assert entry['attempts'] == 1
@@ -0,0 +1,78 @@
+"""
+Incremental metadata sync, migrating from a CSV written before systemdatum was tracked.
+Run from riksdag_thesis/: python -m pytest -q tests
+"""
+import importlib
+import json
+
+import pandas as pd
+
+metadata_module = importlib.import_module('02_download_metadata')
+
+PAGE_SIZE = 5
+
+def protocol(n, datum, systemdatum):
+    return {'dok_id': f"H{n:05d}", 'rm': '2019/20', 'beteckning': str(n), 'titel': f"Protokoll {n}",
+            'datum': datum, 'systemdatum': systemdatum, 'debattnamn': 'kammaren'}
+
+def write_api_metadata(tmp_path):
+    # 12 protocols; H00000 has the oldest datum but was changed last
+    docs = [protocol(n, f"2020-01-{n + 1:02d} 00:00:00", f"2020-02-{n + 1:02d} 10:00:00") for n in range(12)]
+    docs[0]['systemdatum'] = '2020-03-01 10:00:00'
+    path = tmp_path / 'api_metadata.json'
+    path.write_text(json.dumps(docs), encoding='utf-8')
+    return path, docs
+
+def write_old_csv(tmp_path, docs):
+    """Metadata CSV in the format 02 wrote before systemdatum existed"""
+    old = metadata_module.clean_metadata([{k: v for k, v in d.items() if k != 'systemdatum'} for d in docs])
+    old = old.drop(columns='systemdatum')
+    path = tmp_path / 'metadata.csv'
+    old.to_csv(path, index=False)
+    return path
+
+def sync(metadata_file, state_file, api):
+    merged, state, _ = metadata_module.incremental_sync(str(metadata_file), str(state_file), page_size=PAGE_SIZE,
+                                                       base_url=f"{api}/dokumentlista/")
+    merged.to_csv(metadata_file, index=False)
+    metadata_module.save_sync_state(state, str(state_file))
+    return merged, state
+
+def test_migrated_sync_seeds_mark_then_fetches_one_page(tmp_path, stub_api, monkeypatch):
+    api_metadata, docs = write_api_metadata(tmp_path)
+    metadata_file = write_old_csv(tmp_path, docs)
+    state_file = tmp_path / 'state.json'
+    api = stub_api(tmp_path, api_metadata)
+
+    pages = []
+    get_changed = metadata_module.get_changed_debates
+
+    def counting(*args, **kwargs):
+        changed, n_pages = get_changed(*args, **kwargs)
+        pages.append(n_pages)
+        return changed, n_pages
+
+    monkeypatch.setattr(metadata_module, 'get_changed_debates', counting)
+
+    # First run: no mark in the old CSV, so everything is fetched once
+    merged, state = sync(metadata_file, state_file, api)
+    assert pages == [3]
+    assert state['max_systemdatum'] == '2020-03-01 10:00:00'
+    assert merged['systemdatum'].notna().all()
+
+    # Second run: only the page holding the mark
+    merged, state = sync(metadata_file, state_file, api)
+    assert pages == [3, 1]
+    assert len(merged) == len(docs)
+
+def test_missing_marks_load_as_none(tmp_path):
+    state_file = tmp_path / 'state.json'
+    for missing in ('', 'nan', None):
+        state_file.write_text(json.dumps({'max_datum': missing, 'max_systemdatum': missing}), encoding='utf-8')
+        state = metadata_module.load_sync_state(str(state_file))
+        assert state['max_datum'] is None
+        assert state['max_systemdatum'] is None
+
+    old = pd.DataFrame({'dok_id': ['H1'], 'datum': ['2020-01-01'], 'systemdatum': [float('nan')]})
+    assert metadata_module.column_mark(old, 'systemdatum') is None
+    assert metadata_module.column_mark(old, 'datum') == '2020-01-01'
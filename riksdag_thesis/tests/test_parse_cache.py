@@ -0,0 +1,42 @@
+"""
+Parse cache: only successful parses are stored.
+Run from riksdag_thesis/: python -m pytest -q tests
+"""
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from parse_cache import ParseCache
+
+parser_module = importlib.import_module('04_parse_speeches')
+
+SPEECH = ' '.join(['ord'] * 40)
+TRANSCRIPT = f"""<dokumentstatus><dokument><dok_id>HTEST1</dok_id><datum>2020-01-01 00:00:00</datum>
+</dokument><html>&lt;h2&gt;Anf. 1 ANNA ANDERSSON (S):&lt;/h2&gt;&lt;p&gt;{SPEECH}&lt;/p&gt;</html></dokumentstatus>"""
+
+def write_transcript(tmp_path):
+    path = tmp_path / 'HTEST1.txt'
+    path.write_text(TRANSCRIPT, encoding='utf-8')
+    return str(path)
+
+def test_successful_parse_is_cached(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'), 'test')
+    speeches, stats = parser_module.parse_file_with_stats(write_transcript(tmp_path), cache=cache)
+
+    assert stats['error'] == ''
+    assert len(speeches) == 1
+    assert len(cache.entries()) == 1
+
+def test_failed_parse_is_not_cached(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("parser failure")
+
+    monkeypatch.setattr(parser_module, 'find_speakers_lxml', fail)
+    cache = ParseCache(str(tmp_path / 'cache'), 'test')
+    speeches, stats = parser_module.parse_file_with_stats(write_transcript(tmp_path), cache=cache)
+
+    assert speeches == []
+    assert stats['error'] == 'RuntimeError: parser failure'
+    assert cache.entries() == []
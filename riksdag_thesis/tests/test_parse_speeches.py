@@ -0,0 +1,58 @@
+"""
+Speech extraction in 04_parse_speeches.py.
+Run from riksdag_thesis/: python -m pytest -q tests
+"""
+import importlib
+import os
+
+import pytest
+
+parser_module = importlib.import_module('04_parse_speeches')
+
+SPEECH = ' '.join(['ord'] * 40)
+TRANSCRIPT_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'transcripts')
+# Bundled transcripts: long and short protocols, and one without speeches
+FIXTURE_IDS = ['H509121', 'H509124', 'H509138', 'H509141', 'H50976']
+
+def transcript(paragraphs, headers=('Anf. 1 ANNA ANDERSSON (S):',)):
+    """A transcript in the API's format: the protocol HTML escaped inside <html>"""
+    body = ''.join(f"&lt;p&gt;{p}&lt;/p&gt;" for p in paragraphs)
+    html = ''.join(f"&lt;h2&gt;{header}&lt;/h2&gt;{body}" for header in headers)
+    return (f"<dokumentstatus><dokument><dok_id>HTEST1</dok_id><datum>2020-01-01 00:00:00</datum></dokument>"
+            f"<html>{html}</html></dokumentstatus>")
+
+def speech_records(content, engine):
+    # Only the lxml engines have byte offsets, as in compare_engines
+    speeches = parser_module.parse_transcript_content(content, 'HTEST1.txt', engine)
+    return [parser_module.without_offsets(s) for s in speeches]
+
+def test_span_wrapped_soft_hyphen_is_removed():
+    # Every soft hyphen has its own span in the protocol HTML
+    hyphenated = "svens&lt;/span&gt;&lt;span&gt;&amp;#xad;&lt;/span&gt;&lt;span&gt;ka"
+    content = transcript([f"&lt;span&gt;{SPEECH} {hyphenated} företag&lt;/span&gt;"])
+
+    for engine in parser_module.PARSER_ENGINES:
+        speeches = parser_module.parse_transcript_content(content, 'HTEST1.txt', engine)
+        assert len(speeches) == 1
+        assert '\xad' not in speeches[0]['text']
+        assert speeches[0]['text'].endswith('svenska företag')
+
+def test_clean_speech_text_drops_soft_hyphens_with_surrounding_whitespace():
+    assert parser_module.clean_speech_text("svens\n\xad\nka  <b>motio\xadnen</b>") == "svenska motionen"
+
+@pytest.mark.parametrize('dok_id', FIXTURE_IDS)
+def test_lxml_strict_matches_soup(dok_id):
+    with open(os.path.join(TRANSCRIPT_DIR, f"{dok_id}.txt"), 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    assert speech_records(content, 'lxml-strict') == speech_records(content, 'soup')
+
+def test_lxml_matches_soup_without_protocol_structure():
+    # Plain <h2>/<p> markup: no chair turns or end markers for the lxml engine to act on
+    headers = ['Anf. 1 ANNA ANDERSSON (S):', 'Anf. 2 BO BERG (M):', 'Anf. 3 CARL CEDER (SD):']
+    content = transcript([SPEECH, f"{SPEECH} slut"], headers)
+
+    expected = speech_records(content, 'soup')
+    assert len(expected) == 3
+    assert speech_records(content, 'lxml') == expected
+    assert speech_records(content, 'lxml-strict') == expected
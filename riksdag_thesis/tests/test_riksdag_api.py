@@ -0,0 +1,54 @@
+"""
+dokumentlista paging against the stub Riksdag API.
+Run from riksdag_thesis/: python -m pytest -q tests
+"""
+import json
+
+import pytest
+
+from instrumentation import Recorder, recording
+from riksdag_api import iter_dokumentlista, count_documents
+
+N_DOCUMENTS = 23
+PAGE_SIZE = 5
+
+@pytest.fixture
+def api(tmp_path, stub_api):
+    docs = [{'dok_id': f"H{n:05d}", 'rm': '2019/20', 'beteckning': str(n), 'titel': f"Protokoll {n}",
+             'datum': f"2020-01-{n % 28 + 1:02d} 00:00:00", 'systemdatum': f"2020-02-01 10:{n:02d}:00"}
+            for n in range(N_DOCUMENTS)]
+    metadata_file = tmp_path / 'api_metadata.json'
+    metadata_file.write_text(json.dumps(docs), encoding='utf-8')
+    return f"{stub_api(tmp_path, metadata_file)}/dokumentlista/"
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_every_page_is_fetched_once(api, workers):
+    params = {'doktyp': 'prot', 'sort': 'datum'}
+    pages = Recorder()
+
+    with recording(pages):
+        docs = iter_dokumentlista(params, page_size=PAGE_SIZE, workers=workers, base_url=api)
+        dok_ids = [d['dok_id'] for d in docs]
+
+    assert pages.counters['api_pages'] == 5
+    assert len(dok_ids) == N_DOCUMENTS
+    assert set(dok_ids) == {f"H{n:05d}" for n in range(N_DOCUMENTS)}
+
+def test_workers_yield_the_same_documents_in_the_same_order(api):
+    params = {'doktyp': 'prot', 'sort': 'systemdatum', 'sortorder': 'desc'}
+    sequential = [d['dok_id'] for d in iter_dokumentlista(params, page_size=PAGE_SIZE, workers=1, base_url=api)]
+    parallel = [d['dok_id'] for d in iter_dokumentlista(params, page_size=PAGE_SIZE, workers=4, base_url=api)]
+
+    assert parallel == sequential
+    assert count_documents(params, base_url=api) == N_DOCUMENTS
+
+def test_sequential_paging_stops_early(api):
+    params = {'doktyp': 'prot', 'sort': 'systemdatum', 'sortorder': 'desc'}
+    pages = Recorder()
+
+    with recording(pages):
+        for n, _ in enumerate(iter_dokumentlista(params, page_size=PAGE_SIZE, workers=1, base_url=api), 1):
+            if n == PAGE_SIZE + 1:
+                break
+
+    assert pages.counters['api_pages'] == 2
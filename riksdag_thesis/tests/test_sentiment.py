@@ -0,0 +1,37 @@
+"""
+Dictionary-based sentiment scoring with the shipped test lexicon.
+Run from riksdag_thesis/: python -m pytest -q tests
+"""
+import os
+
+import pytest
+
+from sentiment import TEST_LEXICON, load_lexicon, lexicon_collisions, read_lexicon, score_texts
+
+LEXICON = os.path.join(os.path.dirname(__file__), '..', TEST_LEXICON)
+
+def test_known_sentence_score():
+    # bra (+1), viktigt (+0.5), misslyckats (-1), kaos (-1) among 12 tokens
+    sentence = "Det är bra och viktigt, men regeringen har misslyckats och skapat kaos."
+    scores = score_texts([sentence, ''], load_lexicon(LEXICON))
+
+    first = scores.iloc[0]
+    assert first['n_tokens'] == 12
+    assert first['positive'] == pytest.approx(1.5)
+    assert first['negative'] == pytest.approx(2.0)
+    assert first['net_sentiment'] == pytest.approx(-0.5 / 12)
+
+    # Empty text: no tokens, no division by zero
+    assert scores.iloc[1][['n_tokens', 'negative', 'positive', 'net_sentiment']].tolist() == [0, 0, 0, 0]
+
+def test_shipped_lexicon_has_no_hash_collisions():
+    assert lexicon_collisions(read_lexicon(LEXICON)) == {}
+
+def test_lexicon_collision_is_reported(tmp_path, capsys):
+    # crc32 puts these two in the same one of the 2^20 buckets
+    lexicon = tmp_path / 'lexicon.csv'
+    lexicon.write_text("word,polarity\nord8918,1\nord26002,-1\nbra,1\n", encoding='utf-8')
+
+    assert list(lexicon_collisions(read_lexicon(lexicon)).values()) == [['ord8918', 'ord26002']]
+    load_lexicon(lexicon)
+    assert 'ord26002, ord8918' in capsys.readouterr().out
@@ -0,0 +1,37 @@
+"""
+Speaker resolution: ids survive new header variants and hash collisions.
+Run from riksdag_thesis/: python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import speaker_resolution
+from speaker_resolution import resolve_speakers, load_speaker_ids
+
+def save_people(people, path):
+    people.assign(variants=people['variants'].str.join(' | ')).to_csv(path, index=False)
+
+def test_longer_variant_keeps_saved_id(tmp_path):
+    path = str(tmp_path / 'speakers.csv')
+    ids, people = resolve_speakers(['YASMINE POSIO'], ['V'])
+    save_people(people, path)
+
+    new_ids, new_people = resolve_speakers(['YASMINE POSIO', 'YASMINE POSIO NILSSON'], ['V', 'V'],
+                                           load_speaker_ids(path))
+
+    assert len(new_people) == 1
+    assert list(new_ids) == [ids[0], ids[0]]
+
+def test_collision_is_rehashed(monkeypatch):
+    original = speaker_resolution.speaker_id
+    monkeypatch.setattr(speaker_resolution, 'speaker_id',
+                        lambda key: original(key) if '#' in key else 42)
+
+    ids, people = resolve_speakers(['ANNA ANDERSSON', 'BERTIL BERG'], ['S', 'M'])
+
+    assert people['speaker_id'].is_unique
+    assert ids.nunique() == 2
+    # Same input, same resolution
+    assert list(resolve_speakers(['ANNA ANDERSSON', 'BERTIL BERG'], ['S', 'M'])[0]) == list(ids)